@@ -1,11 +1,45 @@
 from astropy.io import fits
 import cv2
+import numpy as np
 import os
+import queue
+import threading
 import traceback
-import psutil
+from concurrent.futures import ThreadPoolExecutor
 from processors.base_processor import BaseProcessor
 from processors.analysis import ImageAnalysis
 from processors.batch import CPUBatchProcessor
+from processors.demosaic import malvar_demosaic
+
+try:
+    import fitsio  # cfitsio-backed reader, much faster header/data parsing
+except ImportError:
+    fitsio = None
+
+def load_fits_image(file_path):
+    """Load primary HDU data and header, using fitsio when available"""
+    if fitsio is not None:
+        with fitsio.FITS(file_path) as f:
+            return f[0].read(), f[0].read_header()
+    with fits.open(file_path) as hdul:
+        return hdul[0].data, hdul[0].header
+
+def to_astropy_header(header):
+    """Convert a fitsio FITSHDR to an astropy Header (pass-through otherwise)"""
+    if fitsio is None or not isinstance(header, fitsio.FITSHDR):
+        return header
+    result = fits.Header()
+    for record in header.records():
+        name = record['name']
+        value = record['value']
+        comment = record.get('comment', '')
+        if name == 'COMMENT':
+            result.add_comment(value)
+        elif name == 'HISTORY':
+            result.add_history(value)
+        else:
+            result[name] = (value, comment)
+    return result
 
 class ImageProcessor(BaseProcessor):
     def __init__(self):
@@ -15,27 +49,44 @@ class ImageProcessor(BaseProcessor):
         # Initialize components
         self.analyzer = ImageAnalysis()
         self.batch_processor = CPUBatchProcessor(self.cpu_count)
+        # Staging buffer reused across frames by debayer_image
+        self._bayer_buf = None
+
+    def _get_bayer_buffer(self, shape):
+        """Return a uint16 staging buffer, reallocating only on shape change"""
+        if self._bayer_buf is None or self._bayer_buf.shape != shape:
+            self._bayer_buf = np.empty(shape, dtype='uint16')
+        return self._bayer_buf
 
     def debayer_image(self, data, header):
         """Convert Bayer pattern to RGB"""
         if 'BAYERPAT' not in header:
             return data
-        
+
         pattern = header['BAYERPAT'].upper()
+        # Edge-aware demosaicing codes; these kernels have wider SIMD
+        # dispatch than the plain bilinear cvtColor path
         pattern_map = {
-            'RGGB': cv2.COLOR_BAYER_RG2RGB,
-            'BGGR': cv2.COLOR_BAYER_BG2RGB,
-            'GRBG': cv2.COLOR_BAYER_GR2RGB,
-            'GBRG': cv2.COLOR_BAYER_GB2RGB
+            'RGGB': cv2.COLOR_BayerRG2RGB_EA,
+            'BGGR': cv2.COLOR_BayerBG2RGB_EA,
+            'GRBG': cv2.COLOR_BayerGR2RGB_EA,
+            'GBRG': cv2.COLOR_BayerGB2RGB_EA
         }
-        
+
         if pattern not in pattern_map:
             return data
-        
+
         try:
-            data_uint16 = data.astype('uint16')
-            return cv2.cvtColor(data_uint16, pattern_map[pattern])
+            # Convert into the reused staging buffer instead of allocating
+            # a fresh uint16 copy per frame
+            data_uint16 = self._get_bayer_buffer(data.shape)
+            np.copyto(data_uint16, data, casting='unsafe')
+            return cv2.demosaicing(data_uint16, pattern_map[pattern])
         except Exception as e:
+            # Numba Malvar-He-Cutler kernel as a fast multicore fallback
+            fallback = malvar_demosaic(data, pattern)
+            if fallback is not None:
+                return fallback
             print(f"Debayering error: {str(e)}")
             return data
 
@@ -55,12 +106,39 @@ class ImageProcessor(BaseProcessor):
         """Process a batch of images"""
         return self.batch_processor.process_batch(batch_data, current_stack, is_color, start_idx)
 
-    def process_images(self, file_paths, progress_callback=None, update_callback=None, preview_callback=None):
+    def _load_batch_file(self, file_path, out=None):
+        """Load a single FITS file for batch processing (thread pool worker)
+
+        When out is given the pixels are converted straight into it, so no
+        intermediate full-frame float32 copy is made. Bayer frames change
+        shape when debayered and are returned as plain arrays instead.
+        """
+        try:
+            if fitsio is not None:
+                with fitsio.FITS(file_path) as f:
+                    header = f[0].read_header()
+                    data = f[0].read()
+                if out is not None:
+                    np.copyto(out, data, casting='unsafe')
+                    return out, header, None
+                return data.astype('float32'), header, None
+            # memmap defers the pixel read so the copyto/astype below is the
+            # only materialization; cache=False avoids retaining file handles
+            # across thousands of frames
+            with fits.open(file_path, memmap=True, lazy_load_hdus=True,
+                           cache=False) as hdul:
+                if out is not None:
+                    np.copyto(out, hdul[0].data, casting='unsafe')
+                    return out, hdul[0].header, None
+                return hdul[0].data.astype('float32'), hdul[0].header, None
+        except Exception as e:
+            return None, None, e
+
+    def process_images(self, file_paths, progress_callback=None, update_callback=None, preview_callback=None, cancel_event=None):
         """Process a list of FITS images"""
         try:
             if progress_callback:
                 progress_callback(f"CPU threads available: {self.cpu_count}", "INFO")
-                progress_callback(f"Batch size: {self.batch_size} images per batch", "INFO")
             
             headers = []
             is_color = None
@@ -68,74 +146,146 @@ class ImageProcessor(BaseProcessor):
             processed_count = 0
             
             # Process first image
-            with fits.open(file_paths[0]) as hdul:
-                first_data = hdul[0].data
-                first_header = hdul[0].header
-                is_color = self.is_color_image(first_header, first_data)
-                
-                if progress_callback:
-                    progress_callback(f"Image type detection: {'Color' if is_color else 'Monochrome'}", "INFO")
-                
-                if is_color and 'BAYERPAT' in first_header:
-                    first_data = self.debayer_image(first_data, first_header)
-                
-                current_stack = first_data.astype('float32')
-                headers.append(first_header)
-                processed_count += 1
-                
-                if preview_callback:
-                    preview_callback(current_stack, first_header)
-                if update_callback:
-                    update_callback(1, len(file_paths))
-            
-            # Update batch size based on image characteristics
-            self.batch_size = self.batch_processor.estimate_optimal_batch_size(
-                first_data.shape,
-                is_color,
-                psutil.virtual_memory().available
-            )
-            
+            first_data, first_header = load_fits_image(file_paths[0])
+            is_color = self.is_color_image(first_header, first_data)
+
             if progress_callback:
-                progress_callback(f"Adjusted batch size: {self.batch_size} images", "INFO")
+                progress_callback(f"Image type detection: {'Color' if is_color else 'Monochrome'}", "INFO")
+
+            if is_color and 'BAYERPAT' in first_header:
+                first_data = self.debayer_image(first_data, first_header)
+
+            current_stack = first_data.astype('float32')
+            headers.append(first_header)
+            processed_count += 1
+
+            if preview_callback:
+                preview_callback(current_stack, first_header)
+            if update_callback:
+                update_callback(1, len(file_paths))
             
-            # Process remaining images in batches
+            # Batch size is deferred to here, where the frame geometry
+            # is known; get_batch_size caches the result per shape
+            self.batch_size = self.get_batch_size(first_data.shape, is_color)
+
+            if progress_callback:
+                progress_callback(f"Batch size: {self.batch_size} images per batch", "INFO")
+
+            # Two slabs so the loader fills one while process_batch reads
+            # the other; each is a single contiguous allocation reused
+            # across batches
+            slabs = (np.empty((self.batch_size,) + current_stack.shape, dtype='float32'),
+                     np.empty((self.batch_size,) + current_stack.shape, dtype='float32'))
+            batches = queue.Queue(maxsize=1)
+            # Slab ownership handback: the consumer's get() frees the
+            # queue slot before process_batch has finished reading the
+            # slab, so the loader must not treat that as permission to
+            # refill it. It may only reuse a slab once the consumer puts
+            # it back here after process_batch returns.
+            free_slabs = queue.Queue()
+            for slab in slabs:
+                free_slabs.put(slab)
             remaining_files = file_paths[1:]
-            for batch_start in range(0, len(remaining_files), self.batch_size):
-                batch_end = min(batch_start + self.batch_size, len(remaining_files))
-                batch_files = remaining_files[batch_start:batch_end]
-                
+            load_error = []
+
+            def load_batches():
+                """Producer: read batches into alternating slabs"""
+                try:
+                    with ThreadPoolExecutor(max_workers=self.cpu_count) as executor:
+                        for batch_start in range(0, len(remaining_files), self.batch_size):
+                            if cancel_event is not None and cancel_event.is_set():
+                                break
+                            batch_end = min(batch_start + self.batch_size, len(remaining_files))
+                            batch_files = remaining_files[batch_start:batch_end]
+                            slab = free_slabs.get()
+
+                            # FITS reads release the GIL in the C layer, so threads
+                            # overlap I/O; executor.map preserves file order for the
+                            # header list. Mono frames decode directly into their slot.
+                            if is_color:
+                                results = executor.map(self._load_batch_file, batch_files)
+                            else:
+                                results = executor.map(self._load_batch_file, batch_files,
+                                                       (slab[i] for i in range(len(batch_files))))
+                            loaded = 0
+                            batch_headers = []
+                            messages = []
+                            for i, (file_path, (data, header, error)) in enumerate(zip(batch_files, results)):
+                                if error is not None:
+                                    messages.append(f"Failed to load {os.path.basename(file_path)}: {str(error)}")
+                                    continue
+
+                                if is_color and 'BAYERPAT' in header:
+                                    data = self.debayer_image(data, header)
+
+                                try:
+                                    # Mono frames are already in slot i; only copy to
+                                    # close a gap left by a failed file, or for color
+                                    if is_color or i != loaded:
+                                        np.copyto(slab[loaded], data)
+                                except ValueError:
+                                    messages.append(f"Skipping {os.path.basename(file_path)}: shape mismatch")
+                                    continue
+                                batch_headers.append(header)
+                                loaded += 1
+
+                            batches.put((slab, loaded, batch_headers, messages))
+                except Exception as e:
+                    load_error.append(e)
+                finally:
+                    batches.put(None)
+
+            # Overlap next-batch reads with current-batch alignment: the
+            # loader is I/O-bound while process_batch is CPU-bound, so
+            # throughput becomes max(load, compute) instead of their sum
+            loader = threading.Thread(target=load_batches, daemon=True)
+            loader.start()
+
+            batch_num = 0
+            cancelled = False
+            while True:
+                item = batches.get()
+                if item is None:
+                    break
+                slab, loaded, batch_headers, messages = item
+                # Keep draining after a cancel so the loader never blocks
+                # on its bounded put or its free-slab get; the loader
+                # stops producing new batches on its own check
+                if cancel_event is not None and cancel_event.is_set():
+                    cancelled = True
+                    free_slabs.put(slab)
+                    continue
+                batch_num += 1
+
                 if progress_callback:
-                    progress_callback(f"Processing batch {(batch_start // self.batch_size) + 1}", "INFO")
-                
-                batch_data = []
-                for file_path in batch_files:
-                    try:
-                        with fits.open(file_path) as hdul:
-                            data = hdul[0].data.astype('float32')
-                            header = hdul[0].header
-                            headers.append(header)
-                            
-                            if is_color and 'BAYERPAT' in header:
-                                data = self.debayer_image(data, header)
-                            
-                            batch_data.append(data)
-                    except Exception as e:
-                        if progress_callback:
-                            progress_callback(f"Failed to load {os.path.basename(file_path)}: {str(e)}", "ERROR")
-                        continue
-                
+                    progress_callback(f"Processing batch {batch_num}", "INFO")
+                    for message in messages:
+                        progress_callback(message, "ERROR")
+
+                headers.extend(batch_headers)
                 current_stack, valid_count = self.process_batch(
-                    batch_data, current_stack, is_color, processed_count
+                    slab[:loaded], current_stack, is_color, processed_count
                 )
+                # process_batch has returned, so nothing reads the slab
+                # any more; hand it back to the loader for refilling
+                free_slabs.put(slab)
                 processed_count += valid_count
-                
+
                 if preview_callback:
                     preview_callback(current_stack, headers[-1])
                 if update_callback:
                     update_callback(processed_count, len(file_paths))
+
+            loader.join()
+            if cancelled:
+                if progress_callback:
+                    progress_callback("Stacking cancelled", "WARNING")
+                return False, None, None
+            if load_error:
+                raise load_error[0]
             
-            # Prepare result
-            result_header = self.merge_headers(headers)
+            # Prepare result (convert any fitsio headers for astropy merging)
+            result_header = self.merge_headers([to_astropy_header(h) for h in headers])
             result_header['NCOMBINE'] = processed_count
             result_header.add_history(f'Stacked {processed_count} frames using astroalign')
             result_header.add_history(f'Reference frame: {os.path.basename(file_paths[0])}')
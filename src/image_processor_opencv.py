@@ -7,11 +7,80 @@ from photutils.background import Background2D, MedianBackground
 import ccdproc
 from astropy.nddata import CCDData
 import astropy.units as u
-from astropy.stats import sigma_clip
 import os
-from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
 import multiprocessing
 import psutil
+from processors.demosaic import malvar_demosaic
+
+try:
+    import fitsio  # cfitsio-backed reader, much faster header/data parsing
+except ImportError:
+    fitsio = None
+
+def load_fits_image(file_path):
+    """Load primary HDU data and header, using fitsio when available"""
+    if fitsio is not None:
+        with fitsio.FITS(file_path) as f:
+            return f[0].read(), f[0].read_header()
+    with fits.open(file_path) as hdul:
+        return hdul[0].data, hdul[0].header
+
+def _quantize_for_detection(channel):
+    """Scale a channel to uint8 for star matching (coarse signal is enough)"""
+    return cv2.normalize(np.ascontiguousarray(channel), None, 0, 255,
+                         cv2.NORM_MINMAX, cv2.CV_8U)
+
+def _align_to_reference(data, reference, is_color, ref8=None):
+    """Align a single image to the reference with optimized memory usage"""
+    try:
+        if is_color:
+            # Ensure data is in HWC format and use green channel for alignment
+            if data.shape[0] == 3:
+                data = np.transpose(data, (1, 2, 0))
+            if reference.shape[0] == 3:
+                reference = np.transpose(reference, (1, 2, 0))
+            src8 = _quantize_for_detection(data[:,:,1])
+            if ref8 is None:
+                ref8 = _quantize_for_detection(reference[:,:,1])
+        else:
+            src8 = _quantize_for_detection(data)
+            if ref8 is None:
+                ref8 = _quantize_for_detection(reference)
+
+        # Find the transform on the quantized channels; it is applied to
+        # the full-precision frame below, so accuracy is unaffected
+        transform, _ = astroalign.find_transform(src8, ref8)
+
+        # find_transform returns a similarity transform, so its 2x3 matrix
+        # feeds straight into OpenCV's SIMD warp; for color frames one call
+        # warps all three channels in a single pass
+        M = transform.params[:2, :]
+        height, width = data.shape[:2]
+        return cv2.warpAffine(data, M, (width, height),
+                              flags=cv2.INTER_LINEAR,
+                              borderMode=cv2.BORDER_REPLICATE)
+    except Exception:
+        return None
+
+def to_astropy_header(header):
+    """Convert a fitsio FITSHDR to an astropy Header (pass-through otherwise)"""
+    if fitsio is None or not isinstance(header, fitsio.FITSHDR):
+        return header
+    result = fits.Header()
+    for record in header.records():
+        name = record['name']
+        value = record['value']
+        comment = record.get('comment', '')
+        if name == 'COMMENT':
+            result.add_comment(value)
+        elif name == 'HISTORY':
+            result.add_history(value)
+        else:
+            result[name] = (value, comment)
+    return result
 
 class ImageProcessor:
     def __init__(self):
@@ -26,6 +95,23 @@ class ImageProcessor:
                 self.use_cuda = True
                 self.cuda_device = cv2.cuda.getDevice()
                 self.cuda_device_name = cv2.cuda.getDeviceInfo(self.cuda_device).name()
+                # Dedicated stream plus a resident stack for the running average
+                self._cuda_stream = cv2.cuda_Stream()
+                self._gpu_stack = None
+                # Probe Bayer conversion support once and keep reusable
+                # GpuMats so the per-frame path has no try/except or allocs
+                self._gpu_in = cv2.cuda_GpuMat()
+                self._gpu_out = cv2.cuda_GpuMat()
+                self._gpu_debayer_ok = {}
+                probe = np.zeros((4, 4), dtype=np.uint16)
+                for code in (cv2.COLOR_BAYER_RG2RGB, cv2.COLOR_BAYER_BG2RGB,
+                             cv2.COLOR_BAYER_GR2RGB, cv2.COLOR_BAYER_GB2RGB):
+                    try:
+                        self._gpu_in.upload(probe)
+                        cv2.cuda.cvtColor(self._gpu_in, code)
+                        self._gpu_debayer_ok[code] = True
+                    except cv2.error:
+                        self._gpu_debayer_ok[code] = False
                 print(f"Successfully initialized CUDA device: {self.cuda_device_name}")
             else:
                 print("No CUDA-capable devices found")
@@ -38,7 +124,19 @@ class ImageProcessor:
         # Calculate optimal batch size based on available memory
         available_memory = psutil.virtual_memory().available
         self.batch_size = max(4, min(16, available_memory // (1024 * 1024 * 1024)))  # 1GB per image estimate
-        
+        # 'fast' = OpenCV star detection, 'photometry' = photutils path
+        self.analyze_mode = 'fast'
+        # Staging buffer reused across frames by debayer_image
+        self._bayer_buf = None
+        # Persistent alignment thread pool, created on first batch
+        self._align_pool = None
+
+    def _get_bayer_buffer(self, shape):
+        """Return a uint16 staging buffer, reallocating only on shape change"""
+        if self._bayer_buf is None or self._bayer_buf.shape != shape:
+            self._bayer_buf = np.empty(shape, dtype=np.uint16)
+        return self._bayer_buf
+
     def is_color_image(self, header, data):
         """Determine if image is color based on header and data"""
         # Check header for color information
@@ -65,81 +163,154 @@ class ImageProcessor:
             'GRBG': cv2.COLOR_BAYER_GR2RGB,
             'GBRG': cv2.COLOR_BAYER_GB2RGB
         }
-        
+        # Edge-aware demosaicing codes for the CPU path; these kernels have
+        # wider SIMD dispatch than the plain bilinear cvtColor path
+        ea_pattern_map = {
+            'RGGB': cv2.COLOR_BayerRG2RGB_EA,
+            'BGGR': cv2.COLOR_BayerBG2RGB_EA,
+            'GRBG': cv2.COLOR_BayerGR2RGB_EA,
+            'GBRG': cv2.COLOR_BayerGB2RGB_EA
+        }
+
         if pattern not in pattern_map:
             return data
-        
+
         try:
-            data_uint16 = data.astype(np.uint16)
-            if self.use_cuda:
-                with cv2.cuda_GpuMat() as gpu_data:
-                    gpu_data.upload(data_uint16)
-                    try:
-                        result = cv2.cuda.cvtColor(gpu_data, pattern_map[pattern])
-                        return result.download()
-                    except cv2.error as e:
-                        print(f"GPU debayering failed: {str(e)}, falling back to CPU")
-                        return cv2.cvtColor(data_uint16, pattern_map[pattern])
-            else:
-                return cv2.cvtColor(data_uint16, pattern_map[pattern])
+            # Convert into the reused staging buffer instead of allocating
+            # a fresh uint16 copy per frame
+            data_uint16 = self._get_bayer_buffer(data.shape)
+            np.copyto(data_uint16, data, casting='unsafe')
+            # Support was probed once at init, so the hot path needs no
+            # per-frame try/except or GpuMat allocation
+            if self.use_cuda and self._gpu_debayer_ok.get(pattern_map[pattern], False):
+                self._gpu_in.upload(data_uint16)
+                cv2.cuda.cvtColor(self._gpu_in, pattern_map[pattern], dst=self._gpu_out)
+                return self._gpu_out.download()
+            return cv2.demosaicing(data_uint16, ea_pattern_map[pattern])
         except Exception as e:
+            # Numba Malvar-He-Cutler kernel as a fast multicore fallback
+            fallback = malvar_demosaic(data, pattern)
+            if fallback is not None:
+                return fallback
             print(f"Debayering error: {str(e)}")
             return data
     
+    def _load_batch_file(self, file_path, out=None):
+        """Load a single FITS file for batch processing (thread pool worker)
+
+        When out is given the pixels are converted straight into it, so no
+        intermediate full-frame float32 copy is made. Bayer frames change
+        shape when debayered and are returned as plain arrays instead.
+        """
+        try:
+            if fitsio is not None:
+                with fitsio.FITS(file_path) as f:
+                    header = f[0].read_header()
+                    data = f[0].read()
+                if out is not None:
+                    np.copyto(out, data, casting='unsafe')
+                    return out, header, None
+                return data.astype(np.float32), header, None
+            # memmap defers the pixel read so the copyto/astype below is the
+            # only materialization; cache=False avoids retaining file handles
+            # across thousands of frames
+            with fits.open(file_path, memmap=True, lazy_load_hdus=True,
+                           cache=False) as hdul:
+                if out is not None:
+                    np.copyto(out, hdul[0].data, casting='unsafe')
+                    return out, hdul[0].header, None
+                return hdul[0].data.astype(np.float32), hdul[0].header, None
+        except Exception as e:
+            return None, None, e
+
     def align_image(self, args):
         """Align a single image with optimized memory usage"""
         data, reference, is_color = args
+        return _align_to_reference(data, reference, is_color)
+
+    def _ensure_align_pool(self):
+        """Create the persistent alignment thread pool on first use"""
+        if self._align_pool is None:
+            self._align_pool = ThreadPoolExecutor(max_workers=self.cpu_count)
+
+    def _shutdown_align_pool(self):
+        """Tear down the alignment thread pool"""
+        if self._align_pool is not None:
+            self._align_pool.shutdown()
+            self._align_pool = None
+
+    def __del__(self):
         try:
-            if is_color:
-                # Ensure data is in HWC format and use green channel for alignment
-                if data.shape[0] == 3:
-                    data = np.transpose(data, (1, 2, 0))
-                if reference.shape[0] == 3:
-                    reference = np.transpose(reference, (1, 2, 0))
-                
-                # Compute transformation using green channel
-                transform = astroalign.find_transform(data[:,:,1], reference[:,:,1])
-                
-                # Preallocate output array
-                aligned_data = np.empty_like(data)
-                for channel in range(3):
-                    aligned_data[:,:,channel] = astroalign.apply_transform(transform[0], 
-                                                                         data[:,:,channel], 
-                                                                         reference[:,:,channel])[0]
-                return aligned_data
-            else:
-                transform = astroalign.find_transform(data, reference)
-                return astroalign.apply_transform(transform[0], data, reference)[0]
+            self._shutdown_align_pool()
         except Exception:
-            return None
+            pass
 
     def process_batch(self, batch_data, current_stack, is_color, start_idx):
         """Process a batch of images efficiently"""
-        align_args = [(data, current_stack, is_color) for data in batch_data]
-        
-        # Use context manager for proper resource cleanup
-        with ProcessPoolExecutor(max_workers=self.cpu_count) as executor:
-            aligned_results = list(executor.map(self.align_image, align_args))
-        
-        # Pre-allocate accumulator array
-        accumulator = np.zeros_like(current_stack, dtype=np.float64)
-        valid_count = 0
-        
-        # Accumulate aligned images
-        for aligned_data in aligned_results:
-            if aligned_data is not None:
-                accumulator += aligned_data
-                valid_count += 1
-        
+        # The transform/warp hot path releases the GIL inside numpy and
+        # OpenCV, so a reused thread pool overlaps alignment across cores
+        # with no pickling of frames or the reference
+        self._ensure_align_pool()
+
+        # Quantize the reference once per batch instead of per frame
+        if is_color:
+            ref_green = current_stack[1] if current_stack.shape[0] == 3 else current_stack[:,:,1]
+        else:
+            ref_green = current_stack
+        ref8 = _quantize_for_detection(ref_green)
+
+        aligned_results = list(self._align_pool.map(
+            lambda data: _align_to_reference(data, current_stack, is_color, ref8),
+            batch_data))
+
+        # Accumulate aligned images with a single C-level reduction
+        valid = [a for a in aligned_results if a is not None]
+        valid_count = len(valid)
+
         if valid_count > 0:
-            # Update running average efficiently
+            # float32 halves the memory traffic of the accumulate; with
+            # batches capped at 16 frames the precision loss is negligible
+            # (compensated summation would only matter for huge batches)
+            accumulator = np.add.reduce(np.asarray(valid), axis=0, dtype=np.float32)
             weight = start_idx / (start_idx + valid_count)
-            current_stack *= weight
-            current_stack += accumulator * (1 - weight) / valid_count
-        
+
+            if self.use_cuda:
+                try:
+                    return self._update_stack_gpu(current_stack, accumulator,
+                                                  weight, valid_count), valid_count
+                except cv2.error as e:
+                    print(f"GPU stack update failed: {str(e)}, falling back to CPU")
+                    # The device copy no longer matches the host stack we
+                    # are about to update (and may be half-written); drop
+                    # it so the next GPU attempt re-uploads the
+                    # authoritative host stack instead of resuming from
+                    # the stale one
+                    self._gpu_stack = None
+
+            # Update running average efficiently, in place
+            np.multiply(current_stack, weight, out=current_stack)
+            current_stack += accumulator * ((1 - weight) / valid_count)
+
         return current_stack, valid_count
+
+    def _update_stack_gpu(self, current_stack, accumulator, weight, valid_count):
+        """Apply the running-average FMA on the GPU-resident stack"""
+        if self._gpu_stack is None:
+            self._gpu_stack = cv2.cuda_GpuMat()
+            self._gpu_stack.upload(current_stack)
+
+        gpu_acc = cv2.cuda_GpuMat()
+        gpu_acc.upload(accumulator, stream=self._cuda_stream)
+        cv2.cuda.addWeighted(self._gpu_stack, weight, gpu_acc,
+                             (1 - weight) / valid_count, 0,
+                             dst=self._gpu_stack, stream=self._cuda_stream)
+        self._cuda_stream.waitForCompletion()
+
+        # The CPU aligner uses the updated stack as the next batch's
+        # reference, so we still have to download it once per batch
+        return self._gpu_stack.download()
     
-    def process_images(self, file_paths, progress_callback=None, update_callback=None, preview_callback=None):
+    def process_images(self, file_paths, progress_callback=None, update_callback=None, preview_callback=None, cancel_event=None):
         """Process a list of FITS images with improved batch processing"""
         try:
             # Log hardware utilization
@@ -155,75 +326,152 @@ class ImageProcessor:
                 progress_callback(f"CPU threads available: {self.cpu_count}", "INFO")
                 progress_callback(f"Batch size: {self.batch_size} images per batch", "INFO")
             
+            # Drop any GPU-resident stack left from a previous run;
+            # _update_stack_gpu re-uploads the fresh stack on first use
+            if self.use_cuda:
+                self._gpu_stack = None
+
             headers = []
             is_color = None
             current_stack = None
             processed_count = 0
-            
+
             # First pass: determine image type and load first image
-            with fits.open(file_paths[0]) as hdul:
-                first_data = hdul[0].data
-                first_header = hdul[0].header
-                is_color = self.is_color_image(first_header, first_data)
-                
-                if progress_callback:
-                    progress_callback(f"Image type detection: {'Color' if is_color else 'Monochrome'}", "INFO")
-                    if is_color and self.use_cuda:
-                        progress_callback("Using GPU acceleration for debayering", "INFO")
-                
-                if is_color and 'BAYERPAT' in first_header:
-                    first_data = self.debayer_image(first_data, first_header)
-                
-                current_stack = first_data.astype(np.float32)
-                headers.append(first_header)
-                processed_count += 1
-                
-                if preview_callback:
-                    preview_callback(current_stack, first_header)
-                if update_callback:
-                    update_callback(1, len(file_paths))
+            first_data, first_header = load_fits_image(file_paths[0])
+            is_color = self.is_color_image(first_header, first_data)
+
+            if progress_callback:
+                progress_callback(f"Image type detection: {'Color' if is_color else 'Monochrome'}", "INFO")
+                if is_color and self.use_cuda:
+                    progress_callback("Using GPU acceleration for debayering", "INFO")
+
+            if is_color and 'BAYERPAT' in first_header:
+                first_data = self.debayer_image(first_data, first_header)
+
+            current_stack = first_data.astype(np.float32)
+            headers.append(first_header)
+            processed_count += 1
+
+            if preview_callback:
+                preview_callback(current_stack, first_header)
+            if update_callback:
+                update_callback(1, len(file_paths))
             
-            # Process remaining images in optimized batches
+            # Two slabs so the loader fills one while process_batch reads
+            # the other; each is a single contiguous allocation reused
+            # across batches
+            slabs = (np.empty((self.batch_size,) + current_stack.shape, dtype=np.float32),
+                     np.empty((self.batch_size,) + current_stack.shape, dtype=np.float32))
+            batches = queue.Queue(maxsize=1)
+            # Slab ownership handback: the consumer's get() frees the
+            # queue slot before process_batch has finished reading the
+            # slab, so the loader must not treat that as permission to
+            # refill it. It may only reuse a slab once the consumer puts
+            # it back here after process_batch returns.
+            free_slabs = queue.Queue()
+            for slab in slabs:
+                free_slabs.put(slab)
             remaining_files = file_paths[1:]
-            
-            for batch_start in range(0, len(remaining_files), self.batch_size):
-                batch_end = min(batch_start + self.batch_size, len(remaining_files))
-                batch_files = remaining_files[batch_start:batch_end]
-                
+            load_error = []
+
+            def load_batches():
+                """Producer: read batches into alternating slabs"""
+                try:
+                    with ThreadPoolExecutor(max_workers=self.cpu_count) as load_executor:
+                        for batch_start in range(0, len(remaining_files), self.batch_size):
+                            if cancel_event is not None and cancel_event.is_set():
+                                break
+                            batch_end = min(batch_start + self.batch_size, len(remaining_files))
+                            batch_files = remaining_files[batch_start:batch_end]
+                            slab = free_slabs.get()
+
+                            # Load batch data efficiently; FITS reads release the GIL
+                            # in the C layer, and executor.map preserves file order for
+                            # the header list. Mono frames decode directly into their slot.
+                            if is_color:
+                                results = load_executor.map(self._load_batch_file, batch_files)
+                            else:
+                                results = load_executor.map(self._load_batch_file, batch_files,
+                                                            (slab[i] for i in range(len(batch_files))))
+                            loaded = 0
+                            batch_headers = []
+                            messages = []
+                            for i, (file_path, (data, header, error)) in enumerate(zip(batch_files, results)):
+                                if error is not None:
+                                    messages.append(f"Failed to load {os.path.basename(file_path)}: {str(error)}")
+                                    continue
+
+                                if is_color and 'BAYERPAT' in header:
+                                    data = self.debayer_image(data, header)
+
+                                try:
+                                    # Mono frames are already in slot i; only copy to
+                                    # close a gap left by a failed file, or for color
+                                    if is_color or i != loaded:
+                                        np.copyto(slab[loaded], data)
+                                except ValueError:
+                                    messages.append(f"Skipping {os.path.basename(file_path)}: shape mismatch")
+                                    continue
+                                batch_headers.append(header)
+                                loaded += 1
+
+                            batches.put((slab, loaded, batch_headers, messages))
+                except Exception as e:
+                    load_error.append(e)
+                finally:
+                    batches.put(None)
+
+            # Overlap next-batch reads with current-batch alignment: the
+            # loader is I/O-bound while process_batch is CPU/GPU-bound, so
+            # throughput becomes max(load, compute) instead of their sum
+            loader = threading.Thread(target=load_batches, daemon=True)
+            loader.start()
+
+            batch_num = 0
+            cancelled = False
+            while True:
+                item = batches.get()
+                if item is None:
+                    break
+                slab, loaded, batch_headers, messages = item
+                # Keep draining after a cancel so the loader never blocks
+                # on its bounded put or its free-slab get; the loader
+                # stops producing new batches on its own check
+                if cancel_event is not None and cancel_event.is_set():
+                    cancelled = True
+                    free_slabs.put(slab)
+                    continue
+                batch_num += 1
+
                 if progress_callback:
-                    progress_callback(f"Processing batch {(batch_start // self.batch_size) + 1} with {len(batch_files)} images using {self.cpu_count} threads", "INFO")
-                
-                # Load batch data efficiently
-                batch_data = []
-                for file_path in batch_files:
-                    try:
-                        with fits.open(file_path) as hdul:
-                            data = hdul[0].data.astype(np.float32)
-                            header = hdul[0].header
-                            headers.append(header)
-                            
-                            if is_color and 'BAYERPAT' in header:
-                                data = self.debayer_image(data, header)
-                            
-                            batch_data.append(data)
-                    except Exception as e:
-                        if progress_callback:
-                            progress_callback(f"Failed to load {os.path.basename(file_path)}: {str(e)}", "ERROR")
-                        continue
-                
-                # Process batch
+                    progress_callback(f"Processing batch {batch_num} with {loaded} images using {self.cpu_count} threads", "INFO")
+                    for message in messages:
+                        progress_callback(message, "ERROR")
+
+                headers.extend(batch_headers)
                 current_stack, valid_count = self.process_batch(
-                    batch_data, current_stack, is_color, processed_count
+                    slab[:loaded], current_stack, is_color, processed_count
                 )
+                # process_batch has returned, so nothing reads the slab
+                # any more; hand it back to the loader for refilling
+                free_slabs.put(slab)
                 processed_count += valid_count
-                
+
                 if preview_callback:
                     preview_callback(current_stack, headers[-1])
                 if update_callback:
                     update_callback(processed_count, len(file_paths))
+
+            loader.join()
+            if cancelled:
+                if progress_callback:
+                    progress_callback("Stacking cancelled", "WARNING")
+                return False, None, None
+            if load_error:
+                raise load_error[0]
             
-            # Merge headers and update metadata
-            result_header = self.merge_headers(headers)
+            # Merge headers and update metadata (convert any fitsio headers for astropy merging)
+            result_header = self.merge_headers([to_astropy_header(h) for h in headers])
             result_header['NCOMBINE'] = processed_count
             result_header.add_history(f'Stacked {processed_count} frames using astroalign')
             result_header.add_history(f'Reference frame: {os.path.basename(file_paths[0])}')
@@ -314,7 +562,7 @@ class ImageProcessor:
         return new_header, data
     
     def detect_stars(self, image):
-        """Detect stars using DAOStarFinder"""
+        """Detect stars and return (x, y, flux) tuples, brightest first"""
         try:
             # If color image, use green channel for star detection
             if len(image.shape) == 3:
@@ -323,92 +571,127 @@ class ImageProcessor:
                 data = image[:,:,1]  # Green channel
             else:
                 data = image
-            
+
             # Ensure data is positive
             data = data - np.min(data)
-            
-            # Estimate background
-            bkg_estimator = MedianBackground()
-            bkg = Background2D(data, (50, 50), filter_size=(3, 3),
-                             bkg_estimator=bkg_estimator)
-            
-            # Subtract background
-            data_sub = data - bkg.background
-            
-            # Create DAOStarFinder object
-            mean, median, std = np.mean(data_sub), np.median(data_sub), np.std(data_sub)
-            daofind = DAOStarFinder(fwhm=3.0, threshold=5.*std)
-            
-            # Find stars
-            sources = daofind(data_sub)
-            
-            if sources is None:
-                return []
-            
-            # Return star positions and fluxes
-            stars = []
-            for source in sources:
-                stars.append((source['xcentroid'], source['ycentroid'], source['flux']))
-            
-            # Sort by flux (brightest first)
-            stars.sort(key=lambda x: x[2], reverse=True)
-            return stars
-            
+
+            if self.analyze_mode == 'photometry':
+                return self._detect_stars_photutils(data)
+            return self._detect_stars_opencv(data)
+
         except Exception as e:
             print(f"Error detecting stars: {str(e)}")
             return []
+
+    def _detect_stars_opencv(self, data):
+        """Detect star centroids with OpenCV connected components"""
+        # Scale to uint8 once so the whole pipeline runs OpenCV SIMD kernels
+        max_val = np.max(data)
+        if max_val > 0:
+            scaled = (data * (255.0 / max_val)).astype(np.uint8)
+        else:
+            scaled = data.astype(np.uint8)
+
+        # Coarse background from a large median filter, then subtract
+        background = cv2.medianBlur(scaled, 51)
+        data_sub = cv2.subtract(scaled, background)
+
+        mean, std = cv2.meanStdDev(data_sub)
+        threshold = float(mean[0][0]) + 5.0 * float(std[0][0])
+        _, mask = cv2.threshold(data_sub, threshold, 255, cv2.THRESH_BINARY)
+
+        num_labels, labels, stats, centroids = cv2.connectedComponentsWithStats(mask)
+        if num_labels <= 1:
+            return []
+
+        # Per-component flux in one weighted bincount (label 0 is background)
+        flux = np.bincount(labels.ravel(), weights=data_sub.ravel(),
+                           minlength=num_labels)
+        order = np.argsort(flux[1:])[::-1] + 1
+        return [(centroids[i][0], centroids[i][1], flux[i]) for i in order]
+
+    def _detect_stars_photutils(self, data):
+        """Detect stars using Background2D + DAOStarFinder (photometry mode)"""
+        # Estimate background
+        bkg_estimator = MedianBackground()
+        bkg = Background2D(data, (50, 50), filter_size=(3, 3),
+                         bkg_estimator=bkg_estimator)
+
+        # Subtract background
+        data_sub = data - bkg.background
+
+        # Create DAOStarFinder object
+        mean, median, std = np.mean(data_sub), np.median(data_sub), np.std(data_sub)
+        daofind = DAOStarFinder(fwhm=3.0, threshold=5.*std)
+
+        # Find stars
+        sources = daofind(data_sub)
+
+        if sources is None:
+            return []
+
+        # Return star positions and fluxes
+        stars = []
+        for source in sources:
+            stars.append((source['xcentroid'], source['ycentroid'], source['flux']))
+
+        # Sort by flux (brightest first)
+        stars.sort(key=lambda x: x[2], reverse=True)
+        return stars
     
+    def _normalize_channel_gpu(self, gpu_ch):
+        """Shift and scale one GPU-resident channel in place"""
+        min_val, _ = cv2.cuda.minMax(gpu_ch)
+        # Robust max from a quarter-size sample; the percentile commutes
+        # with the min shift, so it is taken on the raw channel
+        sample = cv2.cuda.pyrDown(gpu_ch).download()
+        max_val = float(np.percentile(sample, 99.73)) - min_val
+        if max_val > 0:
+            # (x - min) / max as a single fused alpha*x + gamma kernel
+            cv2.cuda.addWeighted(gpu_ch, 1.0 / max_val, gpu_ch, 0.0,
+                                 -min_val / max_val, dst=gpu_ch)
+        else:
+            cv2.cuda.addWeighted(gpu_ch, 1.0, gpu_ch, 0.0, -min_val, dst=gpu_ch)
+
     def normalize_image(self, data):
         """Normalize image data to positive values"""
         # Handle color images
         if len(data.shape) == 3:
             if data.shape[0] == 3:  # If channels first, transpose
                 data = np.transpose(data, (1, 2, 0))
-            normalized = np.zeros_like(data, dtype=np.float32)
-            
+
             if self.use_cuda:
-                # Process each channel on GPU
-                for i in range(3):
-                    channel = data[:,:,i]
-                    gpu_channel = cv2.cuda_GpuMat()
-                    gpu_channel.upload(channel.astype(np.float32))
-                    
-                    # Normalize on GPU
-                    min_val = float(np.min(channel))
-                    channel_shifted = cv2.cuda.subtract(gpu_channel, min_val)
-                    clipped = sigma_clip(channel_shifted.download(), sigma=3, maxiters=5)
-                    max_val = float(np.max(clipped))
-                    
-                    if max_val > 0:
-                        normalized[:,:,i] = channel_shifted.download() / max_val
-            else:
-                # CPU processing
-                for i in range(3):
-                    channel = data[:,:,i]
-                    min_val = np.min(channel)
-                    channel = channel - min_val
-                    clipped = sigma_clip(channel, sigma=3, maxiters=5)
-                    max_val = np.max(clipped)
-                    if max_val > 0:
-                        normalized[:,:,i] = channel / max_val
+                # Upload once, keep all arithmetic resident, download once
+                gpu = cv2.cuda_GpuMat()
+                gpu.upload(np.ascontiguousarray(data, dtype=np.float32))
+                channels = cv2.cuda.split(gpu)
+                for gpu_ch in channels:
+                    self._normalize_channel_gpu(gpu_ch)
+                return cv2.cuda.merge(channels).download()
+
+            # CPU processing: all three channels in one set of axis
+            # reductions, writing into an uninitialized buffer instead
+            # of a zeroed one filled channel by channel
+            mins = data.min(axis=(0, 1))
+            shifted = data - mins
+            # 99.73th percentile matches the old 3-sigma clip for a
+            # Gaussian background in a single partition-based pass
+            maxes = np.percentile(shifted, 99.73, axis=(0, 1))
+            maxes[maxes <= 0] = 1.0
+            normalized = np.empty(shifted.shape, dtype=np.float32)
+            np.divide(shifted, maxes, out=normalized)
             return normalized
         else:
             # Monochrome image processing
             if self.use_cuda:
                 gpu_data = cv2.cuda_GpuMat()
                 gpu_data.upload(data.astype(np.float32))
-                min_val = float(np.min(data))
-                data_shifted = cv2.cuda.subtract(gpu_data, min_val)
-                clipped = sigma_clip(data_shifted.download(), sigma=3, maxiters=5)
-                max_val = float(np.max(clipped))
-                if max_val > 0:
-                    return data_shifted.download() / max_val
-                return data_shifted.download()
+                self._normalize_channel_gpu(gpu_data)
+                return gpu_data.download()
             else:
                 min_val = np.min(data)
                 data = data - min_val
-                clipped = sigma_clip(data, sigma=3, maxiters=5)
-                max_val = np.max(clipped)
+                max_val = np.percentile(data, 99.73)
                 if max_val > 0:
                     data = data / max_val
                 return data
@@ -424,23 +707,19 @@ class ImageProcessor:
             else:
                 analyze_data = data
             
+            # Compute frame statistics once with SIMD meanStdDev; uploading
+            # the frame to the GPU just for two scalars costs more than it saves
+            mean_arr, std_arr = cv2.meanStdDev(analyze_data)
+            mean = float(mean_arr[0][0])
+            std = float(std_arr[0][0])
+
             # Normalize data for analysis
             norm_data = self.normalize_image(analyze_data)
-            
+
             # Detect stars
             stars = self.detect_stars(norm_data)
             star_count = len(stars)
-            
-            # Calculate basic statistics
-            if self.use_cuda:
-                gpu_data = cv2.cuda_GpuMat()
-                gpu_data.upload(analyze_data.astype(np.float32))
-                mean = float(cv2.cuda.mean(gpu_data)[0])
-                std = float(cv2.cuda.meanStdDev(gpu_data)[1][0])
-            else:
-                mean = np.mean(analyze_data)
-                std = np.std(analyze_data)
-            
+
             snr = mean / std if std > 0 else 0
             
             # Calculate average star intensity
@@ -1,6 +1,6 @@
-from PyQt6.QtWidgets import QTextEdit, QWidget, QVBoxLayout, QLabel
-from PyQt6.QtCore import Qt, pyqtSlot
-from PyQt6.QtGui import QFont, QTextCursor
+from PyQt6.QtWidgets import QPlainTextEdit, QWidget, QVBoxLayout, QLabel
+from PyQt6.QtCore import Qt, pyqtSlot, QTimer
+from PyQt6.QtGui import QFont, QColor, QTextCharFormat, QTextCursor
 from datetime import datetime
 
 class LogWindow(QWidget):
@@ -16,43 +16,67 @@ class LogWindow(QWidget):
         title.setFont(QFont('Arial', 10, QFont.Weight.Bold))
         layout.addWidget(title)
         
-        # Log text area
-        self.log_text = QTextEdit()
+        # Log text area; QPlainTextEdit lays out far faster than QTextEdit
+        # and the block cap bounds memory during long sessions
+        self.log_text = QPlainTextEdit()
         self.log_text.setReadOnly(True)
+        self.log_text.setMaximumBlockCount(1000)
         self.log_text.setFont(QFont('Courier', 9))
         self.log_text.setStyleSheet("""
-            QTextEdit {
+            QPlainTextEdit {
                 background-color: #1E1E1E;
                 color: #FFFFFF;
                 border: 1px solid #333333;
             }
         """)
         layout.addWidget(self.log_text)
-    
+
+        # Preset char formats per severity; plain-text inserts with these
+        # skip Qt's HTML parser entirely
+        self._ts_fmt = QTextCharFormat()
+        self._ts_fmt.setForeground(QColor('#888888'))
+        self._fmts = {}
+        for message_type, color in (("INFO", "#FFFFFF"),     # White
+                                    ("SUCCESS", "#00FF00"),  # Green
+                                    ("WARNING", "#FFA500"),  # Orange
+                                    ("ERROR", "#FF0000")):   # Red
+            fmt = QTextCharFormat()
+            fmt.setForeground(QColor(color))
+            self._fmts[message_type] = fmt
+
+        # Buffer incoming lines and flush on a timer so bulk loading
+        # costs one layout pass per interval instead of one per message
+        self._pending = []
+        self._flush_timer = QTimer(self)
+        self._flush_timer.setInterval(80)
+        self._flush_timer.timeout.connect(self._flush)
+        self._flush_timer.start()
+
     @pyqtSlot(str)
     def log(self, message, message_type="INFO"):
         """Add a message to the log with timestamp"""
         timestamp = datetime.now().strftime("%H:%M:%S")
-        
-        # Color coding based on message type
-        color = {
-            "INFO": "#FFFFFF",    # White
-            "SUCCESS": "#00FF00", # Green
-            "WARNING": "#FFA500", # Orange
-            "ERROR": "#FF0000"    # Red
-        }.get(message_type, "#FFFFFF")
-        
-        # Format message with HTML
-        formatted_message = f'<span style="color: #888888">[{timestamp}]</span> <span style="color: {color}">{message}</span><br>'
-        
-        # Add message to log
-        self.log_text.moveCursor(QTextCursor.MoveOperation.End)
-        self.log_text.insertHtml(formatted_message)
-        
+        self._pending.append((timestamp, message, message_type))
+
+    def _flush(self):
+        """Append all buffered messages in a single layout pass"""
+        if not self._pending:
+            return
+        cursor = self.log_text.textCursor()
+        cursor.movePosition(QTextCursor.MoveOperation.End)
+        cursor.beginEditBlock()
+        for timestamp, message, message_type in self._pending:
+            cursor.insertText(f"[{timestamp}] ", self._ts_fmt)
+            cursor.insertText(message + "\n",
+                              self._fmts.get(message_type, self._fmts["INFO"]))
+        cursor.endEditBlock()
+        self._pending.clear()
+
         # Auto-scroll to bottom
         scrollbar = self.log_text.verticalScrollBar()
         scrollbar.setValue(scrollbar.maximum())
-    
+
     def clear(self):
         """Clear the log window"""
+        self._pending.clear()
         self.log_text.clear()
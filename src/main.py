@@ -1,18 +1,24 @@
 import sys
 import os
+import atexit
 import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 from PyQt6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
                            QFileDialog, QMessageBox, QProgressBar,
                            QPushButton, QDialog, QLabel, QSpinBox, QDialogButtonBox)
-from PyQt6.QtCore import Qt
+from PyQt6.QtCore import Qt, QObject, QThreadPool, pyqtSignal
 
 from widgets import (MenuPanel, PreviewWidget, FileListTabs, StatusBar)
-from threads import LoadingThread, ProcessingThread, AnalysisThread
+from threads import LoadingThread, ProcessingThread
 from preprocessing_dialog import PreprocessingDialog
 from preview_dialog import PreviewDialog
 from image_processor import ImageProcessor
 from log_window import LogWindow
 
+class AnalysisBridge(QObject):
+    """Relays analysis results from executor threads into the Qt loop"""
+    finished = pyqtSignal(str, dict)  # filepath, analysis results
+
 class ScoreDialog(QDialog):
     def __init__(self, parent=None):
         super().__init__(parent)
@@ -115,13 +121,28 @@ class MainWindow(QMainWindow):
         # Initialize image processor
         self.image_processor = ImageProcessor()
         self.processing_thread = None
-        self.analysis_threads = []
         self.loading_thread = None
-        
+
+        # One worker budget shared by the header scanner and the analysis
+        # pool so the two running together cannot oversubscribe the
+        # machine; two cores stay free for the GUI and I/O threads
+        self.cpu_budget = max(1, multiprocessing.cpu_count() - 2)
+
+        # Analysis is CPU-bound (Canny, Hough, peak detection), so Python
+        # threads serialize on the GIL; a persistent process pool scales
+        # it with cores. The bridge hops results back onto the Qt loop.
+        self.analysis_executor = ProcessPoolExecutor(max_workers=self.cpu_budget)
+        atexit.register(self.analysis_executor.shutdown)
+        # Bound the shared runnable pool to the same budget; anything
+        # queued on it (preview renders and friends) reuses these
+        # threads instead of spawning per-file QThreads
+        QThreadPool.globalInstance().setMaxThreadCount(self.cpu_budget)
+        self.analysis_bridge = AnalysisBridge()
+        self.analysis_bridge.finished.connect(self.handle_analysis_finished)
+
         # Track preprocessing progress
         self.preprocessing_total = 0
         self.preprocessing_completed = 0
-        self.preprocessing_queue = []
     
     def select_all(self):
         """Select all files in the current table"""
@@ -193,10 +214,10 @@ class MainWindow(QMainWindow):
             self.cancel_button.setText("Cancelling...")
             self.status_bar.showMessage("Cancelling file loading...")
     
-    def handle_file_loaded(self, filepath, header, data):
-        """Handle a loaded file"""
+    def handle_file_batch_loaded(self, batch):
+        """Handle a batch of loaded files"""
         current_table = self.file_tabs.get_current_table()
-        current_table.add_file(filepath, header, data)
+        current_table.add_files(batch)
     
     def load_images(self, frame_type):
         """Handle image loading"""
@@ -238,13 +259,13 @@ class MainWindow(QMainWindow):
             self.menu_panel.load_flat_button.setEnabled(False)
             self.menu_panel.load_bias_button.setEnabled(False)
             
-            # Create and start loading thread
-            self.loading_thread = LoadingThread(files)
+            # Create and start loading thread, sized from the shared budget
+            self.loading_thread = LoadingThread(files, max_workers=self.cpu_budget)
             
             # Connect signals
             self.loading_thread.progress.connect(self.log_window.log)
             self.loading_thread.progress_update.connect(self.update_progress)
-            self.loading_thread.file_loaded.connect(self.handle_file_loaded)
+            self.loading_thread.file_batch_loaded.connect(self.handle_file_batch_loaded)
             self.loading_thread.error.connect(
                 lambda filepath, error: self.log_window.log(f"Error loading {filepath}: {error}", "ERROR")
             )
@@ -299,67 +320,63 @@ class MainWindow(QMainWindow):
             self.menu_panel.load_flat_button.setEnabled(True)
             self.menu_panel.load_bias_button.setEnabled(True)
     
-    def handle_analysis_progress(self, current, total):
-        """Handle preprocessing progress updates"""
-        self.preprocessing_completed += 1
-        self.update_progress(self.preprocessing_completed, self.preprocessing_total)
-        
-        # Start next analysis if there are files in queue
-        if self.preprocessing_queue:
-            filepath = self.preprocessing_queue.pop(0)
-            self.start_analysis_thread(filepath)
-    
-    def handle_analysis_finished(self, result, filepath):
+    def handle_analysis_finished(self, filepath, result):
         """Handle completion of a single file analysis"""
         current_table = self.file_tabs.get_current_table()
         current_table.update_analysis_data(filepath, result)
-        
+
+        self.preprocessing_completed += 1
+        self.update_progress(self.preprocessing_completed, self.preprocessing_total)
+
         if self.preprocessing_completed == self.preprocessing_total:
             self.progress_bar.setVisible(False)
             self.status_bar.showMessage("Preprocessing complete")
             self.log_window.log("Preprocessing complete", "SUCCESS")
-    
-    def start_analysis_thread(self, filepath):
-        """Start a new analysis thread"""
-        thread = AnalysisThread(filepath, self.preprocessing_total, self.preprocessing_completed, self.image_processor)
-        thread.progress.connect(self.log_window.log)
-        thread.progress_update.connect(self.handle_analysis_progress)
-        thread.finished.connect(lambda result: self.handle_analysis_finished(result, filepath))
-        self.analysis_threads.append(thread)
-        thread.start()
-    
+
     def preprocess_images(self):
         """Handle image preprocessing"""
         dialog = PreprocessingDialog(self)
         if dialog.exec():
             current_table = self.file_tabs.get_current_table()
             total_files = len(current_table.files)
-            
+
             if total_files == 0:
                 return
-            
+
             self.log_window.log(f"Starting preprocessing of {total_files} files...")
             self.status_bar.showMessage("Preprocessing images...")
-            
+
             # Show progress bar
             self.progress_bar.setVisible(True)
             self.progress_bar.setValue(0)
             self.preprocessing_total = total_files
             self.preprocessing_completed = 0
-            
-            # Clear any existing analysis threads
-            self.analysis_threads.clear()
-            
-            # Initialize preprocessing queue
-            self.preprocessing_queue = current_table.files.copy()
-            
-            # Start initial batch of analysis threads
-            max_concurrent = max(1, multiprocessing.cpu_count())
-            initial_batch = self.preprocessing_queue[:max_concurrent]
-            self.preprocessing_queue = self.preprocessing_queue[max_concurrent:]
-            
-            for filepath in initial_batch:
-                self.start_analysis_thread(filepath)
+
+            # Submit everything to the process pool; analyze_image is a
+            # picklable staticmethod and runs entirely in the workers
+            for filepath in current_table.files:
+                future = self.analysis_executor.submit(
+                    PreprocessingDialog.analyze_image, filepath)
+                future.add_done_callback(
+                    lambda f, fp=filepath: self._relay_analysis_result(fp, f))
+
+    def _relay_analysis_result(self, filepath, future):
+        """Forward a finished analysis to the Qt loop (executor thread)"""
+        try:
+            result = future.result()
+        except Exception as e:
+            print(f"Error analyzing {filepath}: {str(e)}")
+            result = {
+                "Score": "-",
+                "Stars": "-",
+                "FWHM": "-",
+                "Sky Background": "-",
+                "Hot Pixels": "-",
+                "Star Trails": "-"
+            }
+        # Cross-thread signal emission is queued, so the slot runs on
+        # the main thread
+        self.analysis_bridge.finished.emit(filepath, result)
     
     def process_images(self):
         """Handle image processing"""
@@ -421,7 +438,19 @@ class MainWindow(QMainWindow):
             self.status_bar.showMessage("Processing failed", 5000)
             QMessageBox.warning(self, "Error", "Failed to process images")
 
+def warm_up_astropy():
+    """Initialize astropy once before any worker process or thread starts
+
+    Disables IERS auto-download and forces module initialization here so
+    each analysis worker doesn't redo the cold start (or race to fetch
+    the same tables over the network).
+    """
+    from astropy.utils.iers import conf
+    conf.auto_download = False
+    from astropy.io import fits  # noqa: F401 - force module init
+
 def main():
+    warm_up_astropy()
     app = QApplication(sys.argv)
     app.setStyle('Fusion')
     window = MainWindow()
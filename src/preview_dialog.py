@@ -2,10 +2,27 @@ from PyQt6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QPushButton,
                                QLabel, QFileDialog)
 from PyQt6.QtCore import Qt
 from PyQt6.QtGui import QImage, QPixmap
+import io
 import numpy as np
 import cv2
 from astropy.io import fits
 
+# One CLAHE instance reused across previews; creating it per dialog
+# rebuilds the tile LUTs every time
+_CLAHE = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8))
+
+def save_fits_buffered(path, header, data):
+    """Serialize the HDU to memory first, then write the file in one call
+
+    astropy's writeto issues many small writes for the header cards; with
+    the HISTORY-heavy headers produced by stacking, staging through BytesIO
+    is dramatically faster.
+    """
+    buf = io.BytesIO()
+    fits.HDUList([fits.PrimaryHDU(data=data, header=header)]).writeto(buf)
+    with open(path, 'wb') as f:
+        f.write(buf.getvalue())
+
 class PreviewDialog(QDialog):
     def __init__(self, image_data, fits_header, parent=None):
         super().__init__(parent)
@@ -25,75 +42,8 @@ class PreviewDialog(QDialog):
         # Check if color image
         is_color = fits_header.get('COLORIMG', False)
         
-        if is_color:
-            # Handle color image
-            # Normalize each channel
-            normalized = np.zeros_like(image_data)
-            if len(image_data.shape) == 3 and image_data.shape[2] == 3:
-                for i in range(3):
-                    channel = image_data[:, :, i]
-                    normalized[:, :, i] = cv2.normalize(channel, None, 0, 255, cv2.NORM_MINMAX)
-                
-                # Convert to uint8
-                normalized = normalized.astype(np.uint8)
-                
-                # Convert to LAB color space
-                lab = cv2.cvtColor(normalized, cv2.COLOR_RGB2LAB)
-                l, a, b = cv2.split(lab)
-                
-                # Apply CLAHE to L channel
-                clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8,8))
-                l = clahe.apply(l)
-                
-                # Merge channels and convert back to RGB
-                lab = cv2.merge((l, a, b))
-                enhanced = cv2.cvtColor(lab, cv2.COLOR_LAB2RGB)
-            else:
-                # Handle monochrome image treated as color
-                normalized = cv2.normalize(image_data, None, 0, 255, cv2.NORM_MINMAX).astype(np.uint8)
-                normalized = np.squeeze(normalized)  # Ensure it's 2D
-                # Apply CLAHE
-                clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8,8))
-                l = clahe.apply(normalized)
-                # Convert back to 3-channel image
-                enhanced = cv2.cvtColor(l, cv2.COLOR_GRAY2RGB)
+        q_img = self._prepare_preview(image_data, is_color)
 
-            height, width, channels = enhanced.shape
-            
-            # Scale image if too large
-            max_size = 800
-            if width > max_size or height > max_size:
-                scale = max_size / max(width, height)
-                new_width = int(width * scale)
-                new_height = int(height * scale)
-                enhanced = cv2.resize(enhanced, (new_width, new_height))
-            
-            # Convert to QImage
-            bytes_per_line = 3 * enhanced.shape[1]
-            q_img = QImage(enhanced.data, enhanced.shape[1], enhanced.shape[0],
-                         bytes_per_line, QImage.Format.Format_RGB888)
-        else:
-            # Handle monochrome image
-            normalized = cv2.normalize(image_data, None, 0, 255, cv2.NORM_MINMAX).astype(np.uint8)
-            normalized = np.squeeze(normalized)  # Ensure it's 2D
-            clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8,8))
-            l = clahe.apply(normalized)  # Apply CLAHE to 2D image
-            enhanced = cv2.cvtColor(l, cv2.COLOR_GRAY2RGB)
-            height, width, channels = enhanced.shape
-            
-            # Scale image if too large
-            max_size = 800
-            if width > max_size or height > max_size:
-                scale = max_size / max(width, height)
-                new_width = int(width * scale)
-                new_height = int(height * scale)
-                enhanced = cv2.resize(enhanced, (new_width, new_height))
-            
-            # Convert to QImage
-            bytes_per_line = 3 * enhanced.shape[1]
-            q_img = QImage(enhanced.data, enhanced.shape[1], enhanced.shape[0],
-                         bytes_per_line, QImage.Format.Format_RGB888)
-        
         pixmap = QPixmap.fromImage(q_img)
         preview_label.setPixmap(pixmap)
         layout.addWidget(preview_label)
@@ -121,6 +71,55 @@ class PreviewDialog(QDialog):
         # Set dialog size
         self.resize(pixmap.width() + 100, pixmap.height() + 100)
     
+    def _prepare_preview(self, image_data, is_color):
+        """Build the preview QImage: normalize, downscale, CLAHE, to RGB
+
+        Mono and color share one pipeline; only the enhancement step
+        branches on the channel count.
+        """
+        if is_color and len(image_data.shape) == 3 and image_data.shape[2] == 3:
+            # One multi-channel minmax rescale straight to uint8
+            # instead of a Python loop over the channels
+            normalized = cv2.normalize(image_data, None, 0, 255,
+                                       cv2.NORM_MINMAX, dtype=cv2.CV_8U)
+        else:
+            # Monochrome (possibly flagged as color)
+            normalized = cv2.normalize(image_data, None, 0, 255,
+                                       cv2.NORM_MINMAX, dtype=cv2.CV_8U)
+            normalized = np.squeeze(normalized)  # Ensure it's 2D
+
+        # Scale down BEFORE enhancing: the preview is a thumbnail, so
+        # CLAHE and the color-space round-trip run on up to 100x fewer
+        # pixels than the full frame
+        max_size = 800
+        height, width = normalized.shape[:2]
+        if width > max_size or height > max_size:
+            scale = max_size / max(width, height)
+            new_width = int(width * scale)
+            new_height = int(height * scale)
+            normalized = cv2.resize(normalized, (new_width, new_height),
+                                    interpolation=cv2.INTER_AREA)
+
+        if normalized.ndim == 3:
+            # Convert to LAB, apply CLAHE to L, convert back to RGB
+            lab = cv2.cvtColor(normalized, cv2.COLOR_RGB2LAB)
+            l, a, b = cv2.split(lab)
+            l = _CLAHE.apply(l)
+            lab = cv2.merge((l, a, b))
+            enhanced = cv2.cvtColor(lab, cv2.COLOR_LAB2RGB)
+        else:
+            # Apply CLAHE and convert back to 3-channel image
+            l = _CLAHE.apply(normalized)
+            enhanced = cv2.cvtColor(l, cv2.COLOR_GRAY2RGB)
+
+        # .copy() makes the QImage own its pixels; the raw constructor
+        # only borrows the numpy buffer, which dies with `enhanced` and
+        # leaves the pixmap reading freed memory. At thumbnail size this
+        # is one small memcpy.
+        bytes_per_line = 3 * enhanced.shape[1]
+        return QImage(enhanced.data, enhanced.shape[1], enhanced.shape[0],
+                      bytes_per_line, QImage.Format.Format_RGB888).copy()
+
     def save_result(self):
         """Save the stacked result as FITS file"""
         file_path, _ = QFileDialog.getSaveFileName(
@@ -165,9 +164,8 @@ class PreviewDialog(QDialog):
                 # For color images, FITS expects CHW format
                 # For monochrome, ensure 2D
                 
-                # Create HDU and save
-                hdu = fits.PrimaryHDU(data=data, header=result_header)
-                hdu.writeto(file_path, overwrite=True)
+                # Create HDU and save through a single buffered write
+                save_fits_buffered(file_path, result_header, data)
                 self.accept()
                 
             except Exception as e:
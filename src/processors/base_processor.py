@@ -1,6 +1,5 @@
 import numpy as np
 import multiprocessing
-import psutil
 import os
 from concurrent.futures import ProcessPoolExecutor
 import traceback
@@ -10,9 +9,20 @@ class BaseProcessor:
         """Initialize the base image processor"""
         # Get number of CPU cores for parallel processing
         self.cpu_count = multiprocessing.cpu_count()
-        # Calculate optimal batch size based on available memory
-        available_memory = psutil.virtual_memory().available
-        self.batch_size = max(4, min(16, available_memory // (1024 * 1024 * 1024)))  # 1GB per image estimate
+        # Batch size is chosen on first use, once the frame geometry is
+        # known; the old GB-count guess here ignored the image size
+        self.batch_size = None
+        self._batch_size_cache = {}
+
+    def get_batch_size(self, image_shape, is_color):
+        """Pick and cache the batch size for a given frame geometry"""
+        key = (tuple(image_shape), is_color)
+        if key not in self._batch_size_cache:
+            # Deferred import keeps the memory probe off construction
+            import psutil
+            self._batch_size_cache[key] = self.batch_processor.estimate_optimal_batch_size(
+                image_shape, is_color, psutil.virtual_memory().available)
+        return self._batch_size_cache[key]
 
     def is_color_image(self, header, data):
         """Determine if image is color based on header and data"""
@@ -43,14 +53,24 @@ class BaseProcessor:
         ]
         
         for key in metadata_keys:
-            values = set()
+            # Stop at the second distinct value rather than stringifying
+            # every header's cell into a set; this runs on every save
+            first = None
+            seen = False
+            multi = False
             for header in headers:
                 if key in header:
-                    values.add(str(header[key]))
-            if len(values) == 1:
-                result[key] = headers[0][key]
-            elif len(values) > 1:
+                    value = header[key]
+                    if not seen:
+                        first = value
+                        seen = True
+                    elif value != first:
+                        multi = True
+                        break
+            if multi:
                 result[key] = 'Multiple'
+            elif seen:
+                result[key] = first
         
         return result
     
@@ -61,12 +81,16 @@ class BaseProcessor:
         new_header['BITPIX'] = -32
         
         if is_color:
-            if len(data.shape) == 3:
-                if data.shape[0] == 3:
-                    data = np.transpose(data, (1, 2, 0))
+            # FITS stores NAXIS3 as the slowest axis, i.e. CHW, so keep
+            # that layout rather than transposing the whole cube to HWC;
+            # only the header indexing needs to know which way it came in
+            if len(data.shape) == 3 and data.shape[0] == 3:
+                height, width = data.shape[1], data.shape[2]
+            else:
+                height, width = data.shape[0], data.shape[1]
             new_header['NAXIS'] = 3
-            new_header['NAXIS1'] = data.shape[1]
-            new_header['NAXIS2'] = data.shape[0]
+            new_header['NAXIS1'] = width
+            new_header['NAXIS2'] = height
             new_header['NAXIS3'] = 3
         else:
             new_header['NAXIS'] = 2
@@ -1,17 +1,28 @@
 import numpy as np
-import astroalign
 import traceback
-from scipy.ndimage import gaussian_filter
+import cv2
 
 class AlignmentUtils:
     @staticmethod
     def align_mono_image(data, reference):
         """Align a monochrome image using astroalign"""
+        # Preprocess the reference here; batch callers blur it once and
+        # use align_mono_preprocessed directly
+        ref_proc = cv2.GaussianBlur(reference.astype(np.float32), (0, 0), 1.0)
+        return AlignmentUtils.align_mono_preprocessed(data, ref_proc)
+
+    @staticmethod
+    def align_mono_preprocessed(data, ref_proc):
+        """Align a monochrome image against an already-blurred reference"""
+        # Deferred: astroalign (and its scipy/skimage graph) takes long
+        # enough to import that it would stall GUI startup
+        import astroalign
         try:
-            # Preprocess images
-            data_proc = gaussian_filter(data.astype(np.float32), sigma=1.0)
-            ref_proc = gaussian_filter(reference.astype(np.float32), sigma=1.0)
-            
+            # Preprocess images; cv2's Gaussian is SIMD-backed and
+            # multi-threaded, far faster than scipy's for this sigma.
+            # ksize=(0,0) lets OpenCV pick the minimal kernel.
+            data_proc = cv2.GaussianBlur(data.astype(np.float32), (0, 0), 1.0)
+
             # Use astroalign for registration
             aligned_data, transform = astroalign.register(data_proc, ref_proc)
             
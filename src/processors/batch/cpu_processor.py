@@ -1,69 +1,130 @@
 from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import atexit
 import traceback
 import time
+import cv2
 import numpy as np
 from .base_processor import BaseBatchProcessor
 from .alignment import AlignmentUtils
 
+def _align_shm_image(args):
+    """Align one frame out of shared memory (process pool worker)
+
+    Module-level so only a small name/shape tuple is pickled per task;
+    the frame slab and the reference are mapped by the worker, not
+    serialized through the pipe.
+    """
+    batch_name, batch_shape, ref_name, ref_shape, dtype, idx, is_color = args
+    batch_shm = shared_memory.SharedMemory(name=batch_name)
+    ref_shm = shared_memory.SharedMemory(name=ref_name)
+    try:
+        data = np.ndarray(batch_shape, dtype=dtype, buffer=batch_shm.buf)[idx]
+        # The parent blurs the reference once per batch; every worker
+        # maps the preprocessed copy instead of re-running the Gaussian
+        # on the same frame N times
+        ref_proc = np.ndarray(ref_shape, dtype=dtype, buffer=ref_shm.buf)
+
+        # Handle color images with a single transform: the geometry is
+        # identical across channels, so estimate it on green only and
+        # warp all three planes in one interleaved call (the per-channel
+        # loop ran the star extraction and RANSAC three times)
+        if is_color:
+            # Deferred: astroalign (and its scipy/skimage graph) takes
+            # long enough to import that it would stall GUI startup
+            import astroalign
+            # Blur the source green like align_mono_preprocessed does;
+            # find_transform returns the transform itself (register's
+            # second value is the footprint mask, which has no .params).
+            # On failure it raises and the handler below returns None.
+            blurred_green = cv2.GaussianBlur(
+                np.ascontiguousarray(data[:, :, 1], dtype=np.float32),
+                (0, 0), 1.0)
+            transform, _ = astroalign.find_transform(blurred_green,
+                                                     ref_proc[:, :, 1])
+            height, width = data.shape[:2]
+            return cv2.warpAffine(data, transform.params[:2, :], (width, height),
+                                  flags=cv2.INTER_LINEAR,
+                                  borderMode=cv2.BORDER_REPLICATE)
+
+        # Handle monochrome images
+        result = AlignmentUtils.align_mono_preprocessed(data, ref_proc)
+        return result[0] if result[0] is not None else None
+
+    except Exception as e:
+        print(f"Failed to align image: {str(e)}")
+        traceback.print_exc()
+        return None
+    finally:
+        batch_shm.close()
+        ref_shm.close()
+
 class CPUBatchProcessor(BaseBatchProcessor):
     def __init__(self, cpu_count=1):
         """Initialize CPU batch processor"""
         super().__init__(cpu_count)
-
-    def _align_single_image(self, args):
-        """Align a single image (for parallel processing)"""
-        data, reference, is_color = args
-        try:
-            # Handle color images channel by channel
-            if is_color:
-                aligned_data = np.zeros_like(data)
-                for channel in range(3):
-                    result = AlignmentUtils.align_mono_image(
-                        data[:,:,channel], 
-                        reference[:,:,channel]
-                    )
-                    if result[0] is not None:
-                        aligned_data[:,:,channel] = result[0]
-                    else:
-                        return None
-                return aligned_data
-            else:
-                # Handle monochrome images
-                result = AlignmentUtils.align_mono_image(data, reference)
-                return result[0] if result[0] is not None else None
-            
-        except Exception as e:
-            print(f"Failed to align image: {str(e)}")
-            traceback.print_exc()
-            return None
+        # Persistent worker pool; recreating one per batch forks (or, on
+        # Windows, spawns and re-imports the scientific stack) every call
+        self._align_pool = ProcessPoolExecutor(max_workers=self.cpu_count)
+        atexit.register(self._align_pool.shutdown)
 
     def process_batch(self, batch_data, current_stack, is_color, start_idx):
         """Process a batch of images using CPU parallel processing"""
         try:
             self._reset_timings()
             start_total = time.time()
-            
-            # Prepare alignment arguments
-            align_args = [(data, current_stack, is_color) for data in batch_data]
+
+            if len(batch_data) == 0:
+                return current_stack, 0
+
+            batch = np.ascontiguousarray(batch_data, dtype=np.float32)
+            reference = np.ascontiguousarray(current_stack, dtype=np.float32)
             valid_count = 0
+
+            # Stage the batch and reference in shared memory once per
+            # batch; workers map them by name, so nothing frame-sized is
+            # pickled through the pool's pipes
+            batch_shm = shared_memory.SharedMemory(create=True, size=batch.nbytes)
+            ref_shm = shared_memory.SharedMemory(create=True, size=reference.nbytes)
+            try:
+                np.ndarray(batch.shape, dtype=batch.dtype, buffer=batch_shm.buf)[:] = batch
+                # Blur the reference once, straight into its segment;
+                # the workers then register against the preprocessed
+                # copy instead of each re-blurring the same frame
+                ref_view = np.ndarray(reference.shape, dtype=reference.dtype,
+                                      buffer=ref_shm.buf)
+                cv2.GaussianBlur(reference, (0, 0), 1.0, dst=ref_view)
+
+                align_args = [(batch_shm.name, batch.shape, ref_shm.name,
+                               reference.shape, batch.dtype.str, i, is_color)
+                              for i in range(len(batch))]
+
+                # Reuse the persistent pool instead of restarting workers per batch
+                aligned_results = list(self._align_pool.map(_align_shm_image, align_args))
+            finally:
+                batch_shm.close()
+                batch_shm.unlink()
+                ref_shm.close()
+                ref_shm.unlink()
             
-            # Use ProcessPoolExecutor for parallel processing
-            with ProcessPoolExecutor(max_workers=self.cpu_count) as executor:
-                aligned_results = list(executor.map(self._align_single_image, align_args))
-            
-            # Accumulate aligned images using running average
-            for aligned_data in aligned_results:
-                if aligned_data is not None:
-                    # Update running average
-                    if valid_count == 0:
-                        current_stack = aligned_data
-                    else:
-                        weight = 1.0 / (valid_count + 1)
-                        current_stack = current_stack * (1 - weight) + aligned_data * weight
-                    valid_count += 1
-            
+            # Accumulate aligned images with one bulk reduction instead
+            # of a Python loop allocating two temporaries per frame
+            valid = [a for a in aligned_results if a is not None]
+            valid_count = len(valid)
+
+            if valid_count > 0:
+                batch_sum = np.add.reduce(np.asarray(valid), axis=0, dtype=np.float32)
+                # Weighted merge of the prior running average (start_idx
+                # frames) with this batch's contribution as one fused
+                # SIMD multiply-accumulate; reference is our own
+                # contiguous float32 copy, so it doubles as the output
+                total = start_idx + valid_count
+                current_stack = cv2.addWeighted(reference, start_idx / total,
+                                                batch_sum, 1.0 / total, 0.0,
+                                                dst=reference)
+
             self.timings['total_processing'] = time.time() - start_total
-            
+
             return current_stack, valid_count
             
         except Exception as e:
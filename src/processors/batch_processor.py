@@ -1,9 +1,132 @@
 import numpy as np
 import cupy as cp
+import cupyx
+import cv2
 import astroalign
 from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import atexit
 import traceback
 import time
+from .analysis import ImageAnalysis
+
+# Host staging buffers come from a pinned (page-locked) pool: pinned
+# cudaMemcpy runs at PCIe line rate where pageable copies crawl through
+# a hidden driver staging buffer, and the pool amortizes the expensive
+# pin/unpin across batches
+_pinned_pool = cp.cuda.PinnedMemoryPool()
+cp.cuda.set_pinned_memory_allocator(_pinned_pool.malloc)
+
+# The pinned pool caches freed blocks forever; with the per-batch
+# staging churn above that means host RSS only ever grows. Once more
+# than this many blocks sit idle (steady state needs three: batch,
+# reference, result), the pool is trimmed back to the OS.
+_PINNED_FREE_BLOCKS_MAX = 8
+
+# On-device bilinear affine warp. The matrix rows are the INVERSE
+# transform (destination pixel -> source sample position), matching how
+# skimage/astroalign warp; ch/C can address one channel of an
+# interleaved image, though the batch path feeds contiguous SoA planes
+# with C=1 for fully coalesced reads. Out-of-frame samples resolve to
+# 0, like apply_transform's default fill. Frames are resident in half
+# precision — sampling and interpolation still run in float32
+# registers, only the loads and stores are 16-bit.
+_AFFINE_WARP = cp.RawKernel(r'''
+#include <cuda_fp16.h>
+extern "C" __global__
+void affine_warp(const __half* src, __half* dst,
+                 const int H, const int W, const int C, const int ch,
+                 const float a, const float b, const float c,
+                 const float d, const float e, const float f)
+{
+    int x = blockIdx.x * blockDim.x + threadIdx.x;
+    int y = blockIdx.y * blockDim.y + threadIdx.y;
+    if (x >= W || y >= H) return;
+    float sx = a * x + b * y + c;
+    float sy = d * x + e * y + f;
+    int x0 = __float2int_rd(sx);
+    int y0 = __float2int_rd(sy);
+    float v = 0.0f;
+    if (x0 >= 0 && x0 + 1 < W && y0 >= 0 && y0 + 1 < H) {
+        float fx = sx - x0;
+        float fy = sy - y0;
+        const __half* p = src + (y0 * W + x0) * C + ch;
+        float v00 = __half2float(p[0]);
+        float v01 = __half2float(p[C]);
+        float v10 = __half2float(p[W * C]);
+        float v11 = __half2float(p[W * C + C]);
+        v = (1.0f - fy) * ((1.0f - fx) * v00 + fx * v01)
+          + fy * ((1.0f - fx) * v10 + fx * v11);
+    }
+    dst[(y * W + x) * C + ch] = __float2half(v);
+}
+''', 'affine_warp')
+
+# Fused running-average update: one thread per stack pixel accumulates
+# the weighted sum over the batch in a register and folds in the old
+# stack value, so each aligned pixel is read once and the stack is
+# written once (the cp.sum + multiply-add chain walked both twice).
+# Zero-weight slots (failed alignments) are skipped without the
+# gathered copy a boolean mask would make.
+_WAVG_UPDATE = cp.RawKernel(r'''
+#include <cuda_fp16.h>
+extern "C" __global__
+void wavg_update(const __half* aligned, const float* w, float* stack,
+                 const float current_weight, const int B, const long long N)
+{
+    long long j = blockIdx.x * (long long)blockDim.x + threadIdx.x;
+    if (j >= N) return;
+    float acc = stack[j] * current_weight;
+    for (int i = 0; i < B; ++i) {
+        float wi = w[i];
+        if (wi != 0.0f)
+            acc += wi * __half2float(aligned[(long long)i * N + j]);
+    }
+    stack[j] = acc;
+}
+''', 'wavg_update')
+
+def _control_points(image, max_points=50):
+    """Brightest-first (x, y) control points for find_transform
+
+    find_transform accepts coordinate lists in place of images, so a
+    fixed reference's star extraction can run once per batch instead of
+    once per frame. Returns None when too few stars are found, in which
+    case the caller should hand find_transform the image itself.
+    """
+    stars = ImageAnalysis().detect_stars(image)
+    if len(stars) < 3:
+        return None
+    return np.array([(x, y) for x, y, _ in stars[:max_points]])
+
+def _align_shm_frame(args):
+    """Align one frame out of shared memory (process pool worker)
+
+    Module-level so only a small name/shape tuple is pickled per task;
+    the frame slab and the reference are mapped by the worker rather
+    than serialized through the pool's pipes.
+    """
+    batch_name, batch_shape, ref_name, ref_shape, dtype, idx, is_color = args
+    batch_shm = shared_memory.SharedMemory(name=batch_name)
+    ref_shm = shared_memory.SharedMemory(name=ref_name)
+    try:
+        data = np.ndarray(batch_shape, dtype=dtype, buffer=batch_shm.buf)[idx]
+        reference = np.ndarray(ref_shape, dtype=dtype, buffer=ref_shm.buf)
+        if is_color:
+            transform = astroalign.find_transform(data[:,:,1], reference[:,:,1])
+            height, width = data.shape[:2]
+            M = transform[0].params[:2, :].astype(np.float32)
+            return cv2.warpAffine(data, M, (width, height),
+                                  flags=cv2.INTER_LINEAR)
+        transform = astroalign.find_transform(data, reference)
+        return astroalign.apply_transform(transform[0], data, reference)[0]
+    except Exception as e:
+        print(f"Failed to align image: {str(e)}")
+        traceback.print_exc()
+        return None
+    finally:
+        batch_shm.close()
+        ref_shm.close()
 
 class BatchProcessor:
     def __init__(self, gpu_ops=None, cpu_count=1):
@@ -11,6 +134,44 @@ class BatchProcessor:
         self.gpu_ops = gpu_ops
         self.cpu_count = cpu_count
         self.timings = {}  # Store timing information
+        # Persistent worker pool for the CPU path; spawning one per
+        # batch paid fork plus a full scientific-stack import every call
+        self._pool = ProcessPoolExecutor(max_workers=cpu_count)
+        atexit.register(self._pool.shutdown)
+        # Long-lived arena: routing device allocations through one
+        # MemoryPool keeps the synchronizing cudaMalloc/cudaFree pair
+        # out of every batch boundary, and the fixed-shape scratch
+        # buffers below are reused verbatim across batches
+        self._mempool = cp.cuda.MemoryPool()
+        cp.cuda.set_allocator(self._mempool.malloc)
+        self._scratch_shapes = None
+        self._gpu_batch = None
+        self._gpu_aligned = None
+        self._gpu_stack = None
+        # Copy streams: the batch/reference uploads overlap the CPU
+        # transform estimation, and the result download runs off the
+        # null stream the warp and accumulation kernels use
+        self.h2d_stream = cp.cuda.Stream(non_blocking=True)
+        self.d2h_stream = cp.cuda.Stream(non_blocking=True)
+
+    def _device_scratch(self, batch_shape, stack_shape):
+        """Return persistent device buffers, reallocating only on shape change"""
+        if self._scratch_shapes != (batch_shape, stack_shape):
+            self._gpu_batch = None
+            self._gpu_aligned = None
+            self._gpu_stack = None
+            # Release the old geometry's blocks back to the driver
+            # before carving out the new one
+            self._mempool.free_all_blocks()
+            # Frames live on-device in half precision: astro frames
+            # tolerate FP16 storage when the running mean itself stays
+            # FP32, and it halves both PCIe bytes and the bandwidth of
+            # the warp and reduction passes
+            self._gpu_batch = cp.empty(batch_shape, dtype=cp.float16)
+            self._gpu_aligned = cp.empty(batch_shape, dtype=cp.float16)
+            self._gpu_stack = cp.empty(stack_shape, dtype=cp.float32)
+            self._scratch_shapes = (batch_shape, stack_shape)
+        return self._gpu_batch, self._gpu_aligned, self._gpu_stack
 
     def _reset_timings(self):
         """Reset timing information"""
@@ -34,13 +195,14 @@ class BatchProcessor:
                     reference = np.transpose(reference, (1, 2, 0))
                 
                 transform = astroalign.find_transform(data[:,:,1], reference[:,:,1])
-                
-                aligned_data = np.empty_like(data)
-                for channel in range(3):
-                    aligned_data[:,:,channel] = astroalign.apply_transform(transform[0], 
-                                                                         data[:,:,channel], 
-                                                                         reference[:,:,channel])[0]
-                return aligned_data
+
+                # warpAffine handles interleaved HWC natively, so all
+                # three channels go through one fused C call instead of
+                # three apply_transform dispatches
+                height, width = data.shape[:2]
+                M = transform[0].params[:2, :].astype(np.float32)
+                return cv2.warpAffine(data, M, (width, height),
+                                      flags=cv2.INTER_LINEAR)
             else:
                 transform = astroalign.find_transform(data, reference)
                 return astroalign.apply_transform(transform[0], data, reference)[0]
@@ -53,92 +215,164 @@ class BatchProcessor:
         """Process multiple images in parallel on GPU"""
         try:
             batch_size = len(batch_data)
-            
-            # Move reference stack to GPU
-            gpu_stack = cp.asarray(current_stack)
-            
-            # Pre-allocate GPU memory and move all data at once
+
+            # Persistent device buffers, SoA for color: channel-separated
+            # planes [C, B, H, W] (stack [C, H, W]) give the warp and
+            # reduction kernels unit-stride rows where interleaved HWC
+            # made every access a stride-3 gather. Mono stays [B, H, W].
+            # gpu_aligned is not zeroed between batches — slots of
+            # failed alignments are masked out of the accumulation, so
+            # stale contents are never read
+            frame_shape = batch_data[0].shape
             if is_color:
-                gpu_batch = cp.stack([cp.asarray(img) for img in batch_data])  # Shape: [B, H, W, C]
-                gpu_aligned = cp.zeros_like(gpu_batch)
+                batch_shape = (3, batch_size) + frame_shape[:2]
+                stack_shape = (3,) + current_stack.shape[:2]
             else:
-                gpu_batch = cp.stack([cp.asarray(img) for img in batch_data])  # Shape: [B, H, W]
-                gpu_aligned = cp.zeros_like(gpu_batch)
-            
-            valid_mask = cp.ones(batch_size, dtype=bool)  # Track valid alignments
-            
+                batch_shape = (batch_size,) + frame_shape
+                stack_shape = current_stack.shape
+            gpu_batch, gpu_aligned, gpu_stack = self._device_scratch(
+                batch_shape, stack_shape)
+
+            # Stage straight from the caller's arrays into the pinned
+            # half-precision SoA slabs: the cast-and-deinterleave pass
+            # is the only host copy made — there is no separate float32
+            # gather, and the CPU transform estimation below reads
+            # batch_data in place while these uploads are in flight.
+            host_batch16 = cupyx.empty_pinned(batch_shape, dtype=np.float16)
+            host_ref_dev = cupyx.empty_pinned(stack_shape, dtype=np.float32)
+            if is_color:
+                for i, img in enumerate(batch_data):
+                    np.copyto(host_batch16[:, i], np.moveaxis(img, -1, 0),
+                              casting='same_kind')
+                np.copyto(host_ref_dev, np.moveaxis(current_stack, -1, 0))
+            else:
+                for i, img in enumerate(batch_data):
+                    np.copyto(host_batch16[i], img, casting='same_kind')
+                np.copyto(host_ref_dev, current_stack)
+            gpu_stack.set(host_ref_dev, stream=self.h2d_stream)
+            gpu_batch.set(host_batch16, stream=self.h2d_stream)
+            # Warp kernels on the null stream must not outrun the uploads
+            cp.cuda.Stream.null.wait_event(self.h2d_stream.record())
+
+            height, width = current_stack.shape[:2]
+            block = (16, 16, 1)
+            grid = ((width + 15) // 16, (height + 15) // 16, 1)
+
+            def warp_on_device(i, channel, matrix):
+                """Launch the bilinear warp for one contiguous plane;
+                only the six inverse-matrix floats cross PCIe"""
+                inv = np.linalg.inv(matrix).astype(np.float32)
+                if is_color:
+                    src, dst = gpu_batch[channel, i], gpu_aligned[channel, i]
+                else:
+                    src, dst = gpu_batch[i], gpu_aligned[i]
+                _AFFINE_WARP(grid, block,
+                             (src, dst,
+                              np.int32(height), np.int32(width),
+                              np.int32(1), np.int32(0),
+                              inv[0, 0], inv[0, 1], inv[0, 2],
+                              inv[1, 0], inv[1, 1], inv[1, 2]))
+
+            # Track valid alignments host-side: the flags are written by
+            # the Python loop below, so a device array would just turn
+            # each failure into a one-element kernel launch
+            valid_mask = np.ones(batch_size, dtype=bool)
+
+            # Extract the reference's control points once per batch; the
+            # reference is fixed, so re-detecting its stars inside every
+            # find_transform call was pure rework
+            if is_color:
+                ref_planes = [current_stack[:, :, c] for c in range(3)]
+                ref_targets = [_control_points(p) for p in ref_planes]
+                ref_targets = [t if t is not None else p
+                               for t, p in zip(ref_targets, ref_planes)]
+            else:
+                ref_target = _control_points(current_stack)
+                if ref_target is None:
+                    ref_target = current_stack
+
             try:
                 if is_color:
-                    # Process all images in parallel for each channel
-                    for channel in range(3):
-                        # Download reference channel once
-                        ref_channel = cp.asnumpy(gpu_stack[:,:,channel])
-                        
-                        # Process each image in the batch
-                        for i in range(batch_size):
-                            try:
-                                # Compute transform (still using CPU astroalign)
-                                img_channel = cp.asnumpy(gpu_batch[i,:,:,channel])
-                                transform = astroalign.find_transform(img_channel, ref_channel)
-                                
-                                # Apply transform on GPU
-                                gpu_aligned[i,:,:,channel] = cp.asarray(
-                                    astroalign.apply_transform(transform[0], img_channel, ref_channel)[0]
-                                )
-                            except Exception:
-                                valid_mask[i] = False
+                    for i in range(batch_size):
+                        try:
+                            for channel in range(3):
+                                # Estimate on the caller's array,
+                                # resample on the device
+                                img_channel = batch_data[i][:,:,channel]
+                                transform = astroalign.find_transform(
+                                    img_channel, ref_targets[channel])
+                                warp_on_device(i, channel, transform[0].params)
+                        except Exception:
+                            valid_mask[i] = False
                 else:
                     # Process monochrome images
-                    ref_data = cp.asnumpy(gpu_stack)
-                    
-                    # Process each image in the batch
                     for i in range(batch_size):
                         try:
-                            # Compute transform
-                            img_data = cp.asnumpy(gpu_batch[i])
-                            transform = astroalign.find_transform(img_data, ref_data)
-                            
-                            # Apply transform on GPU
-                            gpu_aligned[i] = cp.asarray(
-                                astroalign.apply_transform(transform[0], img_data, ref_data)[0]
-                            )
+                            # Estimate transform on the caller's array
+                            img_data = batch_data[i]
+                            transform = astroalign.find_transform(img_data, ref_target)
+                            warp_on_device(i, 0, transform[0].params)
                         except Exception:
                             valid_mask[i] = False
-                
-                # Update running average for all valid alignments
-                valid_count = int(cp.sum(valid_mask))
+
+                # Update running average for all valid alignments with
+                # one fused kernel launch; float32 weights keep the FP16
+                # frames accumulating into the FP32 running mean. The
+                # weight schedule is computed in numpy and shipped up as
+                # one B-float copy — no cp.arange/scatter launches and
+                # no device-to-host sync to read counts back
+                valid_count = int(valid_mask.sum())
                 if valid_count > 0:
+                    w_host = np.zeros(batch_size, dtype=np.float32)
                     if start_idx == 0:
-                        # First batch
-                        weights = cp.zeros(batch_size)
-                        weights[valid_mask] = 1.0 / valid_count
-                        # Add batch and height/width dimensions for broadcasting
-                        weights = weights.reshape(-1, 1, 1)
-                        if is_color:
-                            weights = weights.reshape(-1, 1, 1, 1)
-                        gpu_stack = cp.sum(gpu_aligned[valid_mask] * weights, axis=0)
+                        # First batch: the old stack contributes nothing
+                        w_host[valid_mask] = 1.0 / valid_count
+                        current_weight = 0.0
                     else:
-                        # Subsequent batches
-                        weights = cp.zeros(batch_size)
-                        weights[valid_mask] = 1.0 / (start_idx + cp.arange(valid_count) + 1)
-                        # Add batch and height/width dimensions for broadcasting
-                        weights = weights.reshape(-1, 1, 1)
-                        if is_color:
-                            weights = weights.reshape(-1, 1, 1, 1)
-                        
-                        # Update running average
-                        current_weight = 1.0 - weights[0]  # Weight for current stack
-                        gpu_stack = gpu_stack * current_weight + cp.sum(gpu_aligned[valid_mask] * weights, axis=0)
-                
-                # Move result back to CPU
-                current_stack = cp.asnumpy(gpu_stack)
-                
-                # Clear GPU memory
-                del gpu_batch
-                del gpu_aligned
-                del gpu_stack
-                self.gpu_ops.clear_memory()
+                        w_host[valid_mask] = 1.0 / (start_idx + np.arange(valid_count) + 1)
+                        current_weight = 1.0 - float(w_host[0])  # Weight for current stack
+                    weights = cp.asarray(w_host)
+
+                    n_pix = height * width
+                    threads = 256
+                    blocks = (n_pix + threads - 1) // threads
+                    cw = np.float32(current_weight)
+                    if is_color:
+                        # One launch per contiguous channel plane
+                        for c in range(3):
+                            _WAVG_UPDATE((blocks,), (threads,),
+                                         (gpu_aligned[c], weights, gpu_stack[c],
+                                          cw, np.int32(batch_size),
+                                          np.int64(n_pix)))
+                    else:
+                        _WAVG_UPDATE((blocks,), (threads,),
+                                     (gpu_aligned, weights, gpu_stack,
+                                      cw, np.int32(batch_size),
+                                      np.int64(n_pix)))
                 
+                # Move result back to CPU through a pinned buffer so the
+                # D2H copy also runs at line rate, on its own stream
+                # fenced behind the accumulation kernels
+                host_stack = cupyx.empty_pinned(gpu_stack.shape, dtype=np.float32)
+                self.d2h_stream.wait_event(cp.cuda.Stream.null.record())
+                gpu_stack.get(stream=self.d2h_stream, out=host_stack)
+                self.d2h_stream.synchronize()
+                if is_color:
+                    # Re-interleave the planes to HWC for the rest of
+                    # the pipeline
+                    current_stack = np.ascontiguousarray(
+                        np.moveaxis(host_stack, 0, -1))
+                else:
+                    current_stack = host_stack
+
+                # Scratch buffers stay resident in the pool for the next
+                # batch. Pinned staging blocks are only released back to
+                # the OS when the free list outgrows its steady state
+                # (e.g. after a batch-geometry change), so page-locked
+                # host memory stays bounded over long stacking runs
+                if _pinned_pool.n_free_blocks() > _PINNED_FREE_BLOCKS_MAX:
+                    _pinned_pool.free_all_blocks()
+
                 return current_stack, valid_count
                 
             except Exception as e:
@@ -166,24 +400,46 @@ class BatchProcessor:
                 self.timings['total_processing'] = time.time() - t0
                 
             else:
-                # CPU-based processing
-                align_args = [(data, current_stack, is_color) for data in batch_data]
+                # CPU-based processing: stage the batch and reference in
+                # shared memory once per batch so workers map them by
+                # name instead of receiving pickled frame copies, and
+                # reuse the persistent pool
                 valid_count = 0
-                
-                # Use ProcessPoolExecutor for CPU parallel processing
-                with ProcessPoolExecutor(max_workers=self.cpu_count) as executor:
-                    aligned_results = list(executor.map(self.align_image, align_args))
-                
-                # Accumulate aligned images
-                for aligned_data in aligned_results:
-                    if aligned_data is not None:
-                        if valid_count == 0:
-                            weight = start_idx / (start_idx + 1)
-                            current_stack = current_stack * weight + aligned_data * (1 - weight)
-                        else:
-                            weight = (start_idx + valid_count) / (start_idx + valid_count + 1)
-                            current_stack = current_stack * weight + aligned_data * (1 - weight)
-                        valid_count += 1
+                if len(batch_data) == 0:
+                    return current_stack, 0
+
+                batch = np.ascontiguousarray(batch_data, dtype=np.float32)
+                reference = np.ascontiguousarray(current_stack, dtype=np.float32)
+                batch_shm = shared_memory.SharedMemory(create=True, size=batch.nbytes)
+                ref_shm = shared_memory.SharedMemory(create=True, size=reference.nbytes)
+                try:
+                    np.ndarray(batch.shape, dtype=batch.dtype, buffer=batch_shm.buf)[:] = batch
+                    np.ndarray(reference.shape, dtype=reference.dtype, buffer=ref_shm.buf)[:] = reference
+
+                    align_args = [(batch_shm.name, batch.shape, ref_shm.name,
+                                   reference.shape, batch.dtype.str, i, is_color)
+                                  for i in range(len(batch))]
+                    aligned_results = list(self._pool.map(_align_shm_frame, align_args))
+                finally:
+                    batch_shm.close()
+                    batch_shm.unlink()
+                    ref_shm.close()
+                    ref_shm.unlink()
+
+                # Accumulate aligned images in one bulk reduction: the
+                # per-image running-mean update rewrote the whole stack
+                # (two stack-sized temporaries) once per frame, and its
+                # telescoping weights collapse to a single affine
+                # combination of the old stack and the batch sum
+                valid = [a for a in aligned_results if a is not None]
+                valid_count = len(valid)
+                if valid_count > 0:
+                    batch_sum = np.add.reduce(np.asarray(valid), axis=0,
+                                              dtype=np.float32)
+                    total = start_idx + valid_count
+                    np.multiply(batch_sum, 1.0 / total, out=batch_sum)
+                    current_stack = current_stack * (start_idx / total)
+                    current_stack += batch_sum
             
             # Print timing breakdown for GPU processing
             if self.gpu_ops and self.gpu_ops.use_cuda:
@@ -212,10 +468,21 @@ class BatchProcessor:
         # Account for GPU memory overhead (alignment buffers, etc.)
         if self.gpu_ops and self.gpu_ops.use_cuda:
             overhead_factor = 3.0  # Conservative estimate
-            memory_per_image = bytes_per_image * overhead_factor
-            
+            # Frames are resident in FP16 on the device, so each image
+            # costs half its float32 footprint there
+            memory_per_image = (bytes_per_image // 2) * overhead_factor
+
+            # Budget against what the card actually has free right now
+            # rather than the host-side figure the caller passes in;
+            # 70% leaves headroom for fragmentation in the memory pool
+            try:
+                free_bytes, _ = cp.cuda.Device().mem_info
+                gpu_budget = int(free_bytes * 0.7)
+            except Exception:
+                gpu_budget = available_memory
+
             # For parallel processing, use larger batches
-            max_batch_size = min(8, available_memory // memory_per_image)
+            max_batch_size = min(8, gpu_budget // memory_per_image)
         else:
             overhead_factor = 2.0
             memory_per_image = bytes_per_image * overhead_factor
@@ -0,0 +1,81 @@
+import numpy as np
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+# Row/column of the red sample inside the 2x2 Bayer tile
+BAYER_OFFSETS = {
+    'RGGB': (0, 0),
+    'BGGR': (1, 1),
+    'GRBG': (0, 1),
+    'GBRG': (1, 0)
+}
+
+if numba is not None:
+    @numba.njit(parallel=True, fastmath=True, cache=True)
+    def _malvar_kernel(src, red_y, red_x, dst):
+        """Malvar-He-Cutler 5x5 demosaic into a preallocated HxWx3 output"""
+        height, width = src.shape
+        for y in numba.prange(2, height - 2):
+            for x in range(2, width - 2):
+                c = src[y, x]
+                cross = src[y - 1, x] + src[y + 1, x] + src[y, x - 1] + src[y, x + 1]
+                diag = (src[y - 1, x - 1] + src[y - 1, x + 1] +
+                        src[y + 1, x - 1] + src[y + 1, x + 1])
+                axial_v = src[y - 2, x] + src[y + 2, x]
+                axial_h = src[y, x - 2] + src[y, x + 2]
+
+                at_red = (y % 2 == red_y) and (x % 2 == red_x)
+                at_blue = (y % 2 != red_y) and (x % 2 != red_x)
+
+                if at_red or at_blue:
+                    # Green from the cross, opposite color from the diagonals
+                    g = (4.0 * c + 2.0 * cross - axial_v - axial_h) / 8.0
+                    o = (6.0 * c + 2.0 * diag - 1.5 * (axial_v + axial_h)) / 8.0
+                    if at_red:
+                        dst[y, x, 0] = c
+                        dst[y, x, 1] = g
+                        dst[y, x, 2] = o
+                    else:
+                        dst[y, x, 0] = o
+                        dst[y, x, 1] = g
+                        dst[y, x, 2] = c
+                else:
+                    # Green site: red/blue from row or column neighbors
+                    horiz = (5.0 * c + 4.0 * (src[y, x - 1] + src[y, x + 1])
+                             - diag - axial_h + 0.5 * axial_v) / 8.0
+                    vert = (5.0 * c + 4.0 * (src[y - 1, x] + src[y + 1, x])
+                            - diag - axial_v + 0.5 * axial_h) / 8.0
+                    if y % 2 == red_y:
+                        # Red row: red is horizontal, blue vertical
+                        dst[y, x, 0] = horiz
+                        dst[y, x, 1] = c
+                        dst[y, x, 2] = vert
+                    else:
+                        dst[y, x, 0] = vert
+                        dst[y, x, 1] = c
+                        dst[y, x, 2] = horiz
+
+        # Borders: replicate the raw value into all channels
+        for y in numba.prange(height):
+            for x in range(width):
+                if y < 2 or y >= height - 2 or x < 2 or x >= width - 2:
+                    dst[y, x, 0] = src[y, x]
+                    dst[y, x, 1] = src[y, x]
+                    dst[y, x, 2] = src[y, x]
+
+def malvar_demosaic(data, pattern):
+    """Demosaic a Bayer frame with the Numba Malvar-He-Cutler kernel
+
+    Returns None when numba is unavailable or the pattern is unknown, so
+    callers can keep their existing fallback.
+    """
+    if numba is None or pattern not in BAYER_OFFSETS:
+        return None
+    red_y, red_x = BAYER_OFFSETS[pattern]
+    src = np.asarray(data, dtype=np.float32)
+    dst = np.empty((src.shape[0], src.shape[1], 3), dtype=np.float32)
+    _malvar_kernel(src, red_y, red_x, dst)
+    return dst
@@ -20,13 +20,23 @@ def analyze_fits_file(filepath):
                     print(f"Data type: {hdu.data.dtype}")
                     try:
                         if isinstance(hdu.data, np.ndarray):
-                            print(f"Min value: {np.nanmin(hdu.data)}")
-                            print(f"Max value: {np.nanmax(hdu.data)}")
-                            print(f"Data dimensions: {len(hdu.data.shape)}")
+                            # One scan for everything: per-channel axis
+                            # reductions also yield the global min/max,
+                            # where the old global + per-channel calls
+                            # walked the cube twice per statistic
                             if len(hdu.data.shape) == 3:
+                                ch_min = np.nanmin(hdu.data, axis=(1, 2))
+                                ch_max = np.nanmax(hdu.data, axis=(1, 2))
+                                print(f"Min value: {ch_min.min()}")
+                                print(f"Max value: {ch_max.max()}")
+                                print(f"Data dimensions: {len(hdu.data.shape)}")
                                 print("Channel information:")
                                 for c in range(hdu.data.shape[0]):
-                                    print(f"  Channel {c} - Min: {np.nanmin(hdu.data[c])}, Max: {np.nanmax(hdu.data[c])}")
+                                    print(f"  Channel {c} - Min: {ch_min[c]}, Max: {ch_max[c]}")
+                            else:
+                                print(f"Min value: {np.nanmin(hdu.data)}")
+                                print(f"Max value: {np.nanmax(hdu.data)}")
+                                print(f"Data dimensions: {len(hdu.data.shape)}")
                     except Exception as e:
                         print(f"Could not compute data statistics: {str(e)}")
                 else:
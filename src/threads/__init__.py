@@ -1,5 +1,4 @@
 from .loading_thread import LoadingThread
 from .processing_thread import ProcessingThread
-from .analysis_thread import AnalysisThread
 
-__all__ = ['LoadingThread', 'ProcessingThread', 'AnalysisThread']
+__all__ = ['LoadingThread', 'ProcessingThread']
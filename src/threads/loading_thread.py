@@ -1,111 +1,251 @@
 from PyQt6.QtCore import QThread, pyqtSignal
 from astropy.io import fits
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import ProcessPoolExecutor
 import os
-import multiprocessing
 import traceback
 import gc
 import psutil
 from queue import Queue
-from threading import Lock, Event
+from threading import Lock, Event, Thread
 import hashlib
 import tempfile
-import json
+import pickle
 import mmap
+import time
+
+try:
+    import fitsio  # cfitsio-backed reader, much faster header parsing
+except ImportError:
+    fitsio = None
+
+# numpy dtype for each FITS BITPIX value
+BITPIX_DTYPES = {8: 'uint8', 16: 'int16', 32: 'int32', 64: 'int64',
+                 -32: 'float32', -64: 'float64'}
+
+def header_data_info(header):
+    """Derive shape/dtype from NAXIS*/BITPIX without touching pixel data"""
+    naxis = header.get('NAXIS', 0)
+    if naxis == 0:
+        return {"shape": None, "dtype": None}
+    shape = tuple(header[f'NAXIS{i}'] for i in range(naxis, 0, -1))
+    dtype = BITPIX_DTYPES.get(header['BITPIX'])
+    # Unsigned 16-bit frames are stored as int16 with a BZERO offset
+    if dtype == 'int16' and header.get('BZERO') == 32768 and header.get('BSCALE', 1) == 1:
+        dtype = 'uint16'
+    return {"shape": shape, "dtype": dtype}
+
+def needed_keys(header):
+    """Project a full header down to the keywords the scan consumes
+
+    Only the SCAN_KEYWORDS set is ever read downstream, so the fallback
+    parsers return 20-odd lookups over astropy's card list instead of
+    materializing a dict entry per card.
+    """
+    return {k: header[k] for k in SCAN_KEYWORDS if k in header}
+
+def read_fits_file(filepath):
+    """Read FITS file with fallback methods"""
+    # Fast path: cfitsio parses the header in C, without touching pixels
+    if fitsio is not None:
+        try:
+            hdr = fitsio.read_header(filepath, ext=0)
+            header = {record['name']: record['value']
+                      for record in hdr.records()
+                      if record['name'] in SCAN_KEYWORDS}
+            return header, header_data_info(header)
+        except Exception:
+            pass  # fall through to the astropy attempts below
+    try:
+        # First try: Direct read. memmap=False closes the descriptor as
+        # soon as the file does (a lingering mmap would hold it open, and
+        # thousands of frames exhaust the fd limit); lazy_load_hdus skips
+        # HDUs we never look at and do_not_scale_image_data avoids a
+        # rescaling pass on the pixels
+        with fits.open(filepath, memmap=False, lazy_load_hdus=True,
+                       do_not_scale_image_data=True) as hdul:
+            header = needed_keys(hdul[0].header)
+            # Shape/dtype come straight from the header so the pixel
+            # array is never read or decoded
+            return header, header_data_info(header)
+    except Exception as e1:
+        try:
+            # Second try: Memory mapping with readonly
+            with fits.open(filepath, memmap=True, mode='readonly') as hdul:
+                header = needed_keys(hdul[0].header)
+                return header, header_data_info(header)
+        except Exception as e2:
+            raise Exception(f"Failed to read FITS file after all attempts: {str(e1)}, {str(e2)}")
+
+def cache_path_for(filepath, cache_dir):
+    """Path of the scan-cache entry for a file
+
+    mtime and size are folded into the key, so a re-captured or edited
+    file misses the cache instead of returning stale metadata.
+    """
+    st = os.stat(filepath)
+    key = f"{filepath}|{st.st_mtime_ns}|{st.st_size}"
+    # blake2b beats md5 on short keys and 16 bytes is plenty for a
+    # filename-collision domain
+    digest = hashlib.blake2b(key.encode(), digest_size=16).hexdigest()
+    return os.path.join(cache_dir, digest + '.pkl')
+
+def load_cached_scan(filepath, cache_dir, cache_index=None):
+    """Return a cached (filepath, header, data, error) tuple, or None
+
+    cache_index, when given, is the set of entry filenames present when
+    the run started; misses are answered from it without touching disk.
+    """
+    try:
+        cache_path = cache_path_for(filepath, cache_dir)
+        if (cache_index is not None
+                and os.path.basename(cache_path) not in cache_index):
+            return None
+        with open(cache_path, 'rb') as f:
+            cached_data = pickle.load(f)
+        return filepath, cached_data['header'], cached_data['data'], None
+    except Exception:
+        return None
+
+FITS_BLOCK = 2880
+
+# The only keywords the scan results are ever read for: the table
+# columns in fits_table.py plus what header_data_info needs for
+# shape/dtype. Every other card is skipped by the fast parser.
+SCAN_KEYWORDS = frozenset((
+    'BITPIX', 'NAXIS', 'NAXIS1', 'NAXIS2', 'NAXIS3', 'BZERO', 'BSCALE',
+    'IMAGETYP', 'EXPTIME', 'FILTER', 'CCD-TEMP', 'DATE-OBS', 'OBJECT',
+    'TELESCOP', 'FOCALLEN', 'APERTURE', 'GAIN', 'OFFSET', 'XORGSUBF',
+    'YORGSUBF', 'XPIXSZ', 'BAYERPAT',
+))
+
+def fast_scan_header(buf, keywords=SCAN_KEYWORDS):
+    """Extract a fixed keyword set from raw header bytes with 80-byte slices
+
+    astropy's Header.fromstring runs every card through the full FITS
+    grammar; for scanning we only need a fixed keyword set, so a plain
+    slice walk is enough. Raises on anything it cannot parse cleanly
+    (odd quoting, missing END) and the caller falls back to astropy.
+    """
+    header = {}
+    for pos in range(0, len(buf), 80):
+        card = buf[pos:pos + 80]
+        keyword = card[:8].strip().decode('ascii')
+        if keyword == 'END':
+            return header
+        if keyword not in keywords or card[8:10] != b'= ':
+            continue
+        field = card[10:].strip()
+        if field.startswith(b"'"):
+            if b"''" in field:
+                raise ValueError(f"escaped quote in {keyword}")
+            end = field.find(b"'", 1)
+            if end < 0:
+                raise ValueError(f"unterminated string in {keyword}")
+            value = field[1:end].rstrip().decode('ascii')
+        else:
+            field = field.split(b'/', 1)[0].strip()
+            if field in (b'T', b'F'):
+                value = field == b'T'
+            else:
+                text = field.decode('ascii')
+                try:
+                    value = int(text)
+                except ValueError:
+                    value = float(text.replace('D', 'E'))
+        header[keyword] = value
+    raise ValueError("END card not found")
+
+# Six blocks cover the primary header of almost every camera file, so
+# the common case is one read() syscall per file instead of one per block
+HEADER_CHUNK = 6 * FITS_BLOCK
+
+def read_header_bytes(filepath):
+    """Read raw 2880-byte header blocks up to the END card
+
+    Runs in the single reader thread so disk access stays sequential —
+    parallel reads thrash the queue on rotating or network storage.
+    """
+    chunks = []
+    with open(filepath, 'rb') as f:
+        while True:
+            chunk = f.read(HEADER_CHUNK)
+            # Cards are 80 bytes; stop at the block holding the END card
+            # and trim trailing blocks so only header bytes are returned
+            for off in range(0, len(chunk), FITS_BLOCK):
+                block = chunk[off:off + FITS_BLOCK]
+                if any(block[i:i + 8] == b'END     ' for i in range(0, len(block), 80)):
+                    chunks.append(chunk[:off + FITS_BLOCK])
+                    return b''.join(chunks)
+            chunks.append(chunk)
+            if len(chunk) < HEADER_CHUNK:
+                return b''.join(chunks)
+
+# Only scans slower than this are worth caching: on a local SSD the
+# fast path finishes in well under a millisecond, so writing the cache
+# entry would cost more than the rescan it saves. Slow network mounts
+# and fallback-chain files still get cached.
+CACHE_WRITE_THRESHOLD_NS = 20_000_000
+
+def parse_fits_header(filepath, buf, cache_dir, read_ns=0):
+    """Parse raw header bytes (process pool worker)
+
+    Module-level so it pickles; returns (filepath, header, data, error)
+    and never touches Qt — signals are emitted by the consumer loop in
+    LoadingThread.run. read_ns is how long the reader thread spent on
+    the header bytes, counted toward the cache-write threshold.
+    """
+    t0 = time.perf_counter_ns()
+    try:
+        header = fast_scan_header(buf)
+        data = header_data_info(header)
+    except Exception:
+        try:
+            header = needed_keys(fits.Header.fromstring(buf))
+            data = header_data_info(header)
+        except Exception:
+            # Malformed header blocks: retry with the full fallback chain
+            try:
+                header, data = read_fits_file(filepath)
+            except Exception as e:
+                return filepath, None, None, str(e)
+
+    # Cache only scans that were actually slow; fast local reads beat
+    # the cache round-trip on their own
+    if read_ns + time.perf_counter_ns() - t0 > CACHE_WRITE_THRESHOLD_NS:
+        try:
+            with open(cache_path_for(filepath, cache_dir), 'wb') as f:
+                pickle.dump({'header': header, 'data': data}, f,
+                            protocol=pickle.HIGHEST_PROTOCOL)
+        except:
+            pass  # Ignore cache write errors
+
+    return filepath, header, data, None
 
 class LoadingThread(QThread):
     progress = pyqtSignal(str, str)  # message, type
     progress_update = pyqtSignal(int, int)  # current, total
-    file_loaded = pyqtSignal(str, dict, dict)  # filepath, header, data
+    file_batch_loaded = pyqtSignal(list)  # [(filepath, header, data), ...]
     finished = pyqtSignal()
     error = pyqtSignal(str, str)  # filepath, error message
     
-    def __init__(self, files):
+    def __init__(self, files, max_workers=None):
         super().__init__()
         self.files = files
-        self.max_workers = max(1, multiprocessing.cpu_count() * 2)  # Double the workers
+        # Header parsing is CPU-bound Python, so scale with cores and
+        # leave headroom for the GUI process; callers can pass a worker
+        # budget shared with other pools
+        if max_workers is None:
+            max_workers = max(1, os.cpu_count() - 1)
+        self.max_workers = max_workers
         self.cancel_event = Event()
         self.cache_dir = os.path.join(tempfile.gettempdir(), 'stargazer_cache')
         os.makedirs(self.cache_dir, exist_ok=True)
-    
-    def read_fits_file(self, filepath):
-        """Read FITS file with fallback methods"""
+        # One listdir up front answers every cache miss without a
+        # failed open() syscall per file
         try:
-            # First try: Direct read
-            with fits.open(filepath) as hdul:
-                header = dict(hdul[0].header.items())
-                data = {
-                    "shape": hdul[0].data.shape if hdul[0].data is not None else None,
-                    "dtype": str(hdul[0].data.dtype) if hdul[0].data is not None else None
-                }
-                return header, data
-        except Exception as e1:
-            try:
-                # Second try: Memory mapping with readonly
-                with fits.open(filepath, memmap=True, mode='readonly') as hdul:
-                    header = dict(hdul[0].header.items())
-                    data = {
-                        "shape": hdul[0].data.shape if hdul[0].data is not None else None,
-                        "dtype": str(hdul[0].data.dtype) if hdul[0].data is not None else None
-                    }
-                    return header, data
-            except Exception as e2:
-                try:
-                    # Third try: Copy to temp file first
-                    temp_file = os.path.join(self.cache_dir, f"temp_{os.path.basename(filepath)}")
-                    with open(filepath, 'rb') as src, open(temp_file, 'wb') as dst:
-                        dst.write(src.read())
-                    
-                    with fits.open(temp_file) as hdul:
-                        header = dict(hdul[0].header.items())
-                        data = {
-                            "shape": hdul[0].data.shape if hdul[0].data is not None else None,
-                            "dtype": str(hdul[0].data.dtype) if hdul[0].data is not None else None
-                        }
-                    
-                    try:
-                        os.remove(temp_file)
-                    except:
-                        pass
-                        
-                    return header, data
-                except Exception as e3:
-                    raise Exception(f"Failed to read FITS file after all attempts: {str(e1)}, {str(e2)}, {str(e3)}")
-    
-    def load_single_file(self, filepath):
-        """Load a single FITS file"""
-        try:
-            if self.cancel_event.is_set():
-                return False
-            
-            # Check cache first
-            cache_path = os.path.join(self.cache_dir, hashlib.md5(filepath.encode()).hexdigest() + '.json')
-            if os.path.exists(cache_path):
-                try:
-                    with open(cache_path, 'r') as f:
-                        cached_data = json.load(f)
-                        header = cached_data['header']
-                        data = cached_data['data']
-                except:
-                    header, data = self.read_fits_file(filepath)
-            else:
-                header, data = self.read_fits_file(filepath)
-                
-                # Cache the results
-                try:
-                    with open(cache_path, 'w') as f:
-                        json.dump({'header': header, 'data': data}, f)
-                except:
-                    pass  # Ignore cache write errors
-            
-            # Emit result immediately
-            self.file_loaded.emit(filepath, header, data)
-            return True
-            
-        except Exception as e:
-            self.error.emit(filepath, str(e))
-            self.progress.emit(f"Error loading {os.path.basename(filepath)}: {str(e)}", "ERROR")
-            return False
+            self._cache_index = frozenset(os.listdir(self.cache_dir))
+        except OSError:
+            self._cache_index = frozenset()
     
     def run(self):
         total = len(self.files)
@@ -116,32 +256,75 @@ class LoadingThread(QThread):
             completed = 0
             failed = 0
             
-            # Create thread pool for parallel loading
-            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
-                # Submit all files to the thread pool
-                future_to_file = {
-                    executor.submit(self.load_single_file, filepath): filepath 
-                    for filepath in self.files
-                }
-                
-                # Process completed files as they finish
-                for future in as_completed(future_to_file):
-                    if self.cancel_event.is_set():
-                        break
-                        
-                    filepath = future_to_file[future]
+            # Two-stage pipeline: one reader thread streams header bytes
+            # off disk sequentially (no seek contention), a process pool
+            # parses them in parallel (no GIL). The bounded queue gives
+            # backpressure so the reader blocks when parsers fall behind.
+            pending = Queue(maxsize=2 * self.max_workers)
+
+            with ProcessPoolExecutor(max_workers=self.max_workers) as executor:
+
+                def feed_files():
                     try:
-                        success = future.result()
-                        if success:
-                            completed += 1
-                        else:
-                            failed += 1
-                        self.progress_update.emit(completed + failed, total)
-                        
-                    except Exception as e:
+                        for filepath in self.files:
+                            if self.cancel_event.is_set():
+                                break
+                            cached = load_cached_scan(filepath, self.cache_dir,
+                                                      self._cache_index)
+                            if cached is not None:
+                                pending.put(('done', cached))
+                                continue
+                            try:
+                                t0 = time.perf_counter_ns()
+                                buf = read_header_bytes(filepath)
+                                read_ns = time.perf_counter_ns() - t0
+                            except Exception as e:
+                                pending.put(('done', (filepath, None, None, str(e))))
+                                continue
+                            pending.put(('future', executor.submit(
+                                parse_fits_header, filepath, buf,
+                                self.cache_dir, read_ns)))
+                    finally:
+                        pending.put(None)
+
+                reader = Thread(target=feed_files, daemon=True)
+                reader.start()
+
+                # Consume results in order; all Qt signals are emitted
+                # here, and loaded files go out in chunks so queued
+                # signal traffic doesn't swamp the main-thread event
+                # loop. The 50 ms time flush keeps rows appearing
+                # steadily when the parsers are slow to fill a chunk.
+                batch_buffer = []
+                last_flush = time.monotonic()
+                while True:
+                    item = pending.get()
+                    if item is None:
+                        break
+                    kind, payload = item
+                    result = payload if kind == 'done' else payload.result()
+                    filepath, header, data, load_error = result
+
+                    if load_error is None:
+                        batch_buffer.append((filepath, header, data))
+                        completed += 1
+                        now = time.monotonic()
+                        if len(batch_buffer) >= 32 or now - last_flush > 0.05:
+                            self.file_batch_loaded.emit(batch_buffer)
+                            self.progress_update.emit(completed + failed, total)
+                            batch_buffer = []
+                            last_flush = now
+                    else:
                         failed += 1
-                        self.error.emit(filepath, str(e))
-                        self.progress.emit(f"Failed to load {os.path.basename(filepath)}: {str(e)}", "ERROR")
+                        self.error.emit(filepath, load_error)
+                        self.progress.emit(f"Error loading {os.path.basename(filepath)}: {load_error}", "ERROR")
+                        self.progress_update.emit(completed + failed, total)
+
+                if batch_buffer:
+                    self.file_batch_loaded.emit(batch_buffer)
+                    self.progress_update.emit(completed + failed, total)
+
+                reader.join()
             
             if self.cancel_event.is_set():
                 self.progress.emit("File loading cancelled", "WARNING")
@@ -152,14 +335,12 @@ class LoadingThread(QThread):
                     "SUCCESS" if failed == 0 else "WARNING"
                 )
             
-            # Wait for UI to process all files
-            self.msleep(500)
-            
         except Exception as e:
             self.progress.emit(f"Critical error during loading: {str(e)}", "ERROR")
             self.progress.emit(traceback.format_exc(), "ERROR")
-        
+
         finally:
-            # Ensure all files are processed before finishing
-            self.msleep(500)
+            # Queued connections deliver in emission order, so every
+            # file_batch_loaded above lands before this does — no need
+            # to sleep for the UI to "catch up"
             self.finished.emit()
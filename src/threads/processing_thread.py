@@ -1,5 +1,6 @@
 from PyQt6.QtCore import QThread, pyqtSignal
 import numpy as np
+import threading
 
 class ProcessingThread(QThread):
     progress = pyqtSignal(str, str)  # message, type
@@ -11,7 +12,7 @@ class ProcessingThread(QThread):
         super().__init__()
         self.image_processor = image_processor
         self.files = files
-        self._is_cancelled = False
+        self._cancel = threading.Event()
     
     def run(self):
         """Process images in a separate thread"""
@@ -20,18 +21,24 @@ class ProcessingThread(QThread):
             self.progress.emit(f"Starting to stack {total_files} files...", "INFO")
             self.progress_update.emit(0, total_files)
             
-            # Process images one at a time
+            # Process images one at a time; the bound emit methods go in
+            # directly so each callback is one call into Qt rather than
+            # a lambda frame that then re-emits
             success, stacked_data, header = self.image_processor.process_images(
                 self.files,
-                progress_callback=lambda msg, type: self.progress.emit(msg, type),
-                update_callback=lambda current, total: self.progress_update.emit(current, total),
-                preview_callback=lambda data, hdr: self.preview_update.emit(data, hdr)
+                progress_callback=self.progress.emit,
+                update_callback=self.progress_update.emit,
+                preview_callback=self.preview_update.emit,
+                cancel_event=self._cancel
             )
-            
+
             if success:
                 self.progress.emit(f"Successfully stacked {total_files} files", "SUCCESS")
                 self.progress_update.emit(total_files, total_files)
                 self.finished.emit(True, stacked_data, header)
+            elif self._cancel.is_set():
+                # The processor already reported the cancellation
+                self.finished.emit(False, None, None)
             else:
                 self.progress.emit("Failed to stack images", "ERROR")
                 self.finished.emit(False, None, None)
@@ -42,4 +49,4 @@ class ProcessingThread(QThread):
     
     def cancel(self):
         """Cancel the processing"""
-        self._is_cancelled = True
+        self._cancel.set()
@@ -1,31 +1,82 @@
-from PyQt6.QtWidgets import (QTableWidget, QTableWidgetItem, QHeaderView,
-                           QTabWidget, QCheckBox)
-from PyQt6.QtCore import pyqtSignal, Qt, QTimer
-from PyQt6.QtGui import QColor
+from PyQt6.QtWidgets import QTableView, QHeaderView, QTabWidget
+from PyQt6.QtCore import (pyqtSignal, Qt, QTimer, QAbstractTableModel,
+                          QModelIndex)
+import numpy as np
 import os
+import sys
 
-class SortableTableWidgetItem(QTableWidgetItem):
-    def __init__(self, value):
-        super().__init__(str(value))
-        self.sort_value = value
+def _istr(value):
+    """Intern strings that repeat across files (filters, scopes, flags)"""
+    return sys.intern(value) if isinstance(value, str) else value
 
-    def __lt__(self, other):
-        if isinstance(other, SortableTableWidgetItem):
-            if isinstance(self.sort_value, (int, float)) and isinstance(other.sort_value, (int, float)):
-                return self.sort_value < other.sort_value
-        return super().__lt__(other)
+_basenames = {}
 
-class CheckBoxWidget(QCheckBox):
-    def __init__(self, parent=None):
-        super().__init__(parent)
-        self.setStyleSheet("QCheckBox { margin: 5px; }")
+def _basename(path):
+    """os.path.basename with memoization
+
+    Table rebuilds recompute the basename of every row; the same paths
+    recur for the lifetime of a session, so cache the split once.
+    """
+    name = _basenames.get(path)
+    if name is None:
+        name = _basenames.setdefault(path, os.path.basename(path))
+    return name
+
+def _size_text(p, h, d, a):
+    if d and d.get('shape'):
+        return f"{d['shape'][1]}x{d['shape'][0]}"
+    return f"{h.get('NAXIS1', '-')}x{h.get('NAXIS2', '-')}"
+
+def _bit_depth(p, h, d, a):
+    if d and d.get('shape'):
+        return d['dtype']
+    return h.get('BITPIX', '-')
+
+# One extractor per data column, in HEADER_COLUMNS[1:] order; each takes
+# (filepath, header, data, analysis). build_row walks this tuple once
+# per file instead of assembling a 24-key dict and then looking every
+# column back up by name.
+ROW_EXTRACTORS = (
+    lambda p, h, d, a: _basename(p),                             # Filename
+    lambda p, h, d, a: _istr(h.get('IMAGETYP', 'Light')),        # Type
+    _size_text,                                                  # Size
+    lambda p, h, d, a: f"{h.get('EXPTIME', '-')}s",              # Exposure
+    lambda p, h, d, a: _istr(h.get('FILTER', '-')),              # Filter
+    lambda p, h, d, a: a.get('Score', '-'),                      # Score
+    lambda p, h, d, a: a.get('Stars', '-'),                      # Stars
+    lambda p, h, d, a: a.get('FWHM', '-'),                       # FWHM
+    lambda p, h, d, a: a.get('Sky Background', '-'),             # Sky Background
+    lambda p, h, d, a: a.get('Hot Pixels', '-'),                 # Hot Pixels
+    lambda p, h, d, a: a.get('Star Trails', '-'),                # Star Trails
+    lambda p, h, d, a: f"{h.get('CCD-TEMP', '-')}°C",            # Temperature
+    lambda p, h, d, a: h.get('DATE-OBS', '-'),                   # Date-Time
+    lambda p, h, d, a: _istr(h.get('OBJECT', '-')),              # Object
+    lambda p, h, d, a: _istr(h.get('TELESCOP', '-')),            # Telescope
+    lambda p, h, d, a: f"{h.get('FOCALLEN', '-')}mm",            # Focal Length
+    lambda p, h, d, a: f"{h.get('APERTURE', '-')}mm",            # Aperture
+    lambda p, h, d, a: h.get('GAIN', '-'),                       # Gain
+    lambda p, h, d, a: h.get('OFFSET', '-'),                     # Offset
+    lambda p, h, d, a: f"{h.get('XORGSUBF', '0')},{h.get('YORGSUBF', '0')}",  # ROI
+    lambda p, h, d, a: f"{h.get('XPIXSZ', '-')}µm",              # Pixel Size
+    _bit_depth,                                                  # Bit Depth
+    lambda p, h, d, a: _istr(h.get('BAYERPAT', 'No')),           # Bayered
+)
+
+class FITSTableModel(QAbstractTableModel):
+    """Structure-of-arrays model behind the file tables
+
+    The QTableWidget this replaces allocated ~24 QTableWidgetItems plus
+    a checkbox widget per row — 250k QObjects for 10k files, each with
+    its own string and metaobject registration. Here every column is a
+    single object array and cell text is produced lazily in data(), so
+    a row costs one slot per column and the view only asks for what it
+    paints. The Select column is a plain bool array surfaced through
+    the checkable-item role rather than a widget per row.
+    """
 
-class FITSTableWidget(QTableWidget):
-    file_selected = pyqtSignal(str, dict)
-    
     # Define all possible FITS header keywords we want to display
     HEADER_COLUMNS = [
-        "Select",  # New checkbox column
+        "Select",  # Checkbox column
         "Filename",
         "Type",
         "Size",
@@ -50,95 +101,190 @@ class FITSTableWidget(QTableWidget):
         "Bit Depth",
         "Bayered"
     ]
-    
+
+    COLUMN_INDEX = {name: i for i, name in enumerate(HEADER_COLUMNS)}
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.files = []  # row index -> filepath
+        self.selected = np.zeros(0, dtype=bool)
+        self.columns = {name: np.empty(0, dtype=object)
+                        for name in self.HEADER_COLUMNS[1:]}
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.files)
+
+    def columnCount(self, parent=QModelIndex()):
+        return len(self.HEADER_COLUMNS)
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if (orientation == Qt.Orientation.Horizontal
+                and role == Qt.ItemDataRole.DisplayRole):
+            return self.HEADER_COLUMNS[section]
+        return None
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        col = index.column()
+        if col == 0:
+            if role == Qt.ItemDataRole.CheckStateRole:
+                return (Qt.CheckState.Checked if self.selected[index.row()]
+                        else Qt.CheckState.Unchecked)
+            return None
+        if role == Qt.ItemDataRole.DisplayRole:
+            value = self.columns[self.HEADER_COLUMNS[col]][index.row()]
+            return value if isinstance(value, str) else str(value)
+        return None
+
+    def setData(self, index, value, role=Qt.ItemDataRole.EditRole):
+        if index.isValid() and index.column() == 0 \
+                and role == Qt.ItemDataRole.CheckStateRole:
+            self.selected[index.row()] = (value == Qt.CheckState.Checked.value)
+            self.dataChanged.emit(index, index,
+                                  [Qt.ItemDataRole.CheckStateRole])
+            return True
+        return False
+
+    def flags(self, index):
+        flags = Qt.ItemFlag.ItemIsEnabled | Qt.ItemFlag.ItemIsSelectable
+        if index.column() == 0:
+            flags |= Qt.ItemFlag.ItemIsUserCheckable
+        return flags
+
+    def append_rows(self, filepaths, rows):
+        """Append rows given as lists in HEADER_COLUMNS[1:] order"""
+        if not rows:
+            return
+        first = len(self.files)
+        self.beginInsertRows(QModelIndex(), first, first + len(rows) - 1)
+        self.files.extend(filepaths)
+        self.selected = np.concatenate(
+            [self.selected, np.zeros(len(rows), dtype=bool)])
+        for ci, name in enumerate(self.HEADER_COLUMNS[1:]):
+            new = np.empty(len(rows), dtype=object)
+            for i, row in enumerate(rows):
+                new[i] = row[ci]
+            self.columns[name] = np.concatenate([self.columns[name], new])
+        self.endInsertRows()
+
+    def set_row_values(self, row, values):
+        """Update named columns of one row and notify the view"""
+        touched = [self.COLUMN_INDEX[name] for name in values]
+        for name, value in values.items():
+            self.columns[name][row] = value
+        self.dataChanged.emit(self.index(row, min(touched)),
+                              self.index(row, max(touched)),
+                              [Qt.ItemDataRole.DisplayRole])
+
+    def set_selected_mask(self, mask):
+        """Replace the whole selection mask at once"""
+        self.selected = mask
+        if self.files:
+            self.dataChanged.emit(self.index(0, 0),
+                                  self.index(len(self.files) - 1, 0),
+                                  [Qt.ItemDataRole.CheckStateRole])
+
+    def sort(self, column, order=Qt.SortOrder.AscendingOrder):
+        if column == 0 or not self.files:
+            return
+        values = self.columns[self.HEADER_COLUMNS[column]]
+        # Sort numerically when the whole column converts, else as text
+        # (same rule the per-item __lt__ used to apply pairwise)
+        try:
+            key = values.astype(np.float64)
+        except (ValueError, TypeError):
+            key = np.array([str(v) for v in values], dtype=object)
+        idx = np.argsort(key, kind='stable')
+        if order == Qt.SortOrder.DescendingOrder:
+            idx = idx[::-1]
+        self.beginResetModel()
+        self.files = [self.files[i] for i in idx]
+        self.selected = self.selected[idx]
+        for name in self.columns:
+            self.columns[name] = self.columns[name][idx]
+        self.endResetModel()
+
+    def reset_rows(self, filepaths, rows):
+        """Replace the whole table contents in one model reset"""
+        self.beginResetModel()
+        self.files = []
+        self.selected = np.zeros(0, dtype=bool)
+        self.columns = {name: np.empty(0, dtype=object)
+                        for name in self.HEADER_COLUMNS[1:]}
+        self.endResetModel()
+        self.append_rows(filepaths, rows)
+
+class FITSTableWidget(QTableView):
+    file_selected = pyqtSignal(str, dict)
+
+    HEADER_COLUMNS = FITSTableModel.HEADER_COLUMNS
+
     def __init__(self, main_window):
         super().__init__()
         self.main_window = main_window
-        self.setColumnCount(len(self.HEADER_COLUMNS))
-        self.setHorizontalHeaderLabels(self.HEADER_COLUMNS)
-        
+        self.table_model = FITSTableModel(self)
+        self.setModel(self.table_model)
+
         header = self.horizontalHeader()
         header.setSortIndicatorShown(True)
-        header.sortIndicatorChanged.connect(self.sortItems)
-        
+
         # Set checkbox column width
         self.setColumnWidth(0, 50)
-        
+
         # Set other columns to resize to content
-        for i in range(1, self.columnCount()):
+        for i in range(1, self.table_model.columnCount()):
             header.setSectionResizeMode(i, QHeaderView.ResizeMode.ResizeToContents)
-        
-        self.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
-        self.setSelectionMode(QTableWidget.SelectionMode.SingleSelection)
+
+        self.setSelectionBehavior(QTableView.SelectionBehavior.SelectRows)
+        self.setSelectionMode(QTableView.SelectionMode.SingleSelection)
         self.setSortingEnabled(True)
         self.setAlternatingRowColors(True)
-        
+
         # Optimize table performance
-        self.setUpdatesEnabled(False)  # Disable updates during batch operations
         self.verticalHeader().setDefaultSectionSize(20)  # Fixed row height
         self.horizontalHeader().setMinimumSectionSize(50)
         self.setShowGrid(False)  # Hide grid for better performance
-        
-        self.itemSelectionChanged.connect(self.on_selection_changed)
-        self.files = []
+
+        self.selectionModel().selectionChanged.connect(self.on_selection_changed)
         self.headers = {}
         self.analysis_data = {}
-        
+        self._row_cache = {}  # filepath -> built row list
+
         # Batch update timer
         self.update_timer = QTimer()
         self.update_timer.timeout.connect(self.process_updates)
         self.update_timer.setInterval(16)  # ~60fps
         self.pending_updates = []
-    
+
+    @property
+    def files(self):
+        return self.table_model.files
+
     def get_selected_files(self):
         """Get list of selected files"""
-        selected_files = []
-        for row in range(self.rowCount()):
-            checkbox = self.cellWidget(row, 0)
-            if checkbox and checkbox.isChecked():
-                selected_files.append(self.files[row])
-        return selected_files
-    
+        files = self.table_model.files
+        return [files[i] for i in np.flatnonzero(self.table_model.selected)]
+
     def select_all_files(self):
         """Select all files in the table"""
-        self.setUpdatesEnabled(False)
-        try:
-            for row in range(self.rowCount()):
-                checkbox = self.cellWidget(row, 0)
-                if checkbox:
-                    checkbox.setChecked(True)
-        finally:
-            self.setUpdatesEnabled(True)
-    
+        self.table_model.set_selected_mask(
+            np.ones(len(self.table_model.files), dtype=bool))
+
     def select_no_files(self):
         """Deselect all files in the table"""
-        self.setUpdatesEnabled(False)
-        try:
-            for row in range(self.rowCount()):
-                checkbox = self.cellWidget(row, 0)
-                if checkbox:
-                    checkbox.setChecked(False)
-        finally:
-            self.setUpdatesEnabled(True)
-    
+        self.table_model.set_selected_mask(
+            np.zeros(len(self.table_model.files), dtype=bool))
+
     def select_by_score(self, min_score):
         """Select files with score >= min_score"""
-        selected_count = 0
-        self.setUpdatesEnabled(False)
-        try:
-            for row in range(self.rowCount()):
-                filepath = self.files[row]
-                score = self.get_file_score(filepath)
-                checkbox = self.cellWidget(row, 0)
-                if checkbox and score is not None and score >= min_score:
-                    checkbox.setChecked(True)
-                    selected_count += 1
-                else:
-                    checkbox.setChecked(False)
-        finally:
-            self.setUpdatesEnabled(True)
-        return selected_count
-    
+        mask = np.zeros(len(self.table_model.files), dtype=bool)
+        for row, filepath in enumerate(self.table_model.files):
+            score = self.get_file_score(filepath)
+            mask[row] = score is not None and score >= min_score
+        self.table_model.set_selected_mask(mask)
+        return int(mask.sum())
+
     def get_file_score(self, filepath):
         """Get the score for a specific file"""
         if filepath in self.analysis_data:
@@ -149,87 +295,36 @@ class FITSTableWidget(QTableWidget):
                 except (ValueError, TypeError):
                     pass
         return None
-    
+
+    def build_row(self, filepath, header, data):
+        """Map common FITS keywords to our columns"""
+        analysis = self.analysis_data.get(filepath, {})
+        return [fn(filepath, header, data, analysis) for fn in ROW_EXTRACTORS]
+
     def set_files(self, new_files):
         """Update the table with a new list of files"""
-        self.setUpdatesEnabled(False)
-        try:
-            # Clear current rows but keep the data
-            self.setRowCount(0)
-            
-            # Keep only the files in the new list
-            old_files = self.files
-            self.files = []
-            
-            # Add rows for each file in the new list
-            for filepath in new_files:
-                if filepath in old_files:
-                    # Re-add the file if it was in the old list
-                    row = self.rowCount()
-                    self.insertRow(row)
-                    self.files.append(filepath)
-                    
-                    # Add checkbox
-                    checkbox = CheckBoxWidget(self)
-                    self.setCellWidget(row, 0, checkbox)
-                    
-                    # Restore the file's data
-                    header = self.headers.get(filepath, {})
-                    analysis = self.analysis_data.get(filepath, {})
-                    
-                    # Map common FITS keywords to our columns
-                    info = {
-                        "Filename": os.path.basename(filepath),
-                        "Type": header.get('IMAGETYP', 'Light'),
-                        "Size": f"{header.get('NAXIS1', '-')}x{header.get('NAXIS2', '-')}",
-                        "Exposure": f"{header.get('EXPTIME', '-')}s",
-                        "Filter": header.get('FILTER', '-'),
-                        "Score": analysis.get('Score', '-'),
-                        "Stars": analysis.get('Stars', '-'),
-                        "FWHM": analysis.get('FWHM', '-'),
-                        "Sky Background": analysis.get('Sky Background', '-'),
-                        "Hot Pixels": analysis.get('Hot Pixels', '-'),
-                        "Star Trails": analysis.get('Star Trails', '-'),
-                        "Temperature": f"{header.get('CCD-TEMP', '-')}°C",
-                        "Date-Time": header.get('DATE-OBS', '-'),
-                        "Object": header.get('OBJECT', '-'),
-                        "Telescope": header.get('TELESCOP', '-'),
-                        "Focal Length": f"{header.get('FOCALLEN', '-')}mm",
-                        "Aperture": f"{header.get('APERTURE', '-')}mm",
-                        "Gain": header.get('GAIN', '-'),
-                        "Offset": header.get('OFFSET', '-'),
-                        "ROI": f"{header.get('XORGSUBF', '0')},{header.get('YORGSUBF', '0')}",
-                        "Pixel Size": f"{header.get('XPIXSZ', '-')}µm",
-                        "Bit Depth": header.get('BITPIX', '-'),
-                        "Bayered": header.get('BAYERPAT', 'No')
-                    }
-                    
-                    # Fill in all columns
-                    for col, header_key in enumerate(self.HEADER_COLUMNS[1:], 1):  # Skip checkbox column
-                        value = info.get(header_key, '-')
-                        if isinstance(value, (int, float)):
-                            item = SortableTableWidgetItem(value)
-                        else:
-                            item = QTableWidgetItem(str(value))
-                        self.setItem(row, col, item)
-            
-            # Clean up data for removed files
-            removed_files = set(old_files) - set(new_files)
-            for filepath in removed_files:
-                if filepath in self.headers:
-                    del self.headers[filepath]
-                if filepath in self.analysis_data:
-                    del self.analysis_data[filepath]
-                
-        finally:
-            self.setUpdatesEnabled(True)
-    
-    def on_selection_changed(self):
-        selected_rows = self.selectionModel().selectedRows()
-        if selected_rows:
-            row = selected_rows[0].row()
-            if 0 <= row < len(self.files):
-                filepath = self.files[row]
+        old_files = set(self.table_model.files)
+        kept = [f for f in new_files if f in old_files]
+        # Rows were built (and analysis-updated) when the files arrived,
+        # so a rebuild is just cache lookups plus one model reset
+        rows = [self._row_cache.get(f)
+                or self.build_row(f, self.headers.get(f, {}), None)
+                for f in kept]
+        self.table_model.reset_rows(kept, rows)
+
+        # Clean up data for removed files
+        for filepath in old_files - set(new_files):
+            self.headers.pop(filepath, None)
+            self.analysis_data.pop(filepath, None)
+            self._row_cache.pop(filepath, None)
+
+    def on_selection_changed(self, selected, deselected):
+        rows = self.selectionModel().selectedRows()
+        if rows:
+            row = rows[0].row()
+            files = self.table_model.files
+            if 0 <= row < len(files):
+                filepath = files[row]
                 self.main_window.preview_fits_file(filepath)
                 if filepath in self.headers:
                     self.file_selected.emit(filepath, self.headers[filepath])
@@ -237,14 +332,12 @@ class FITSTableWidget(QTableWidget):
     def update_analysis_data(self, filepath, analysis):
         """Update table with analysis results"""
         try:
-            if not filepath in self.files:
+            if filepath not in self.table_model.files:
                 return
-                
+
             self.analysis_data[filepath] = analysis
-            row = self.files.index(filepath)
-            
-            # Update columns with analysis data
-            col_map = {
+            row = self.table_model.files.index(filepath)
+            values = {
                 "Score": analysis.get("Score", "-"),
                 "Stars": analysis.get("Stars", "-"),
                 "FWHM": analysis.get("FWHM", "-"),
@@ -252,23 +345,13 @@ class FITSTableWidget(QTableWidget):
                 "Hot Pixels": analysis.get("Hot Pixels", "-"),
                 "Star Trails": analysis.get("Star Trails", "-")
             }
-            
-            # Temporarily disable sorting to prevent crashes during update
-            was_sorting_enabled = self.isSortingEnabled()
-            self.setSortingEnabled(False)
-            
-            try:
-                for col_name, value in col_map.items():
-                    col = self.HEADER_COLUMNS.index(col_name)
-                    if isinstance(value, (int, float)):
-                        item = SortableTableWidgetItem(value)
-                    else:
-                        item = QTableWidgetItem(str(value))
-                    self.setItem(row, col, item)
-            finally:
-                # Re-enable sorting if it was enabled
-                self.setSortingEnabled(was_sorting_enabled)
-                
+            self.table_model.set_row_values(row, values)
+            # Keep the cached row in sync so set_files rebuilds don't
+            # resurrect pre-analysis placeholders
+            cached = self._row_cache.get(filepath)
+            if cached is not None:
+                for name, value in values.items():
+                    cached[FITSTableModel.COLUMN_INDEX[name] - 1] = value
         except Exception as e:
             print(f"Error updating analysis data: {str(e)}")
 
@@ -277,110 +360,70 @@ class FITSTableWidget(QTableWidget):
         self.pending_updates.append((filepath, header, data))
         if not self.update_timer.isActive():
             self.update_timer.start()
-    
+
+    def add_files(self, batch):
+        """Queue a batch of (filepath, header, data) tuples at once"""
+        self.pending_updates.extend(batch)
+        if not self.update_timer.isActive():
+            self.update_timer.start()
+
     def process_updates(self):
         """Process pending updates"""
         if not self.pending_updates:
             self.update_timer.stop()
             return
-        
+
         # Process all pending updates at once
         updates = self.pending_updates
         self.pending_updates = []
-        
-        self.setUpdatesEnabled(False)
-        try:
-            for filepath, header, data in updates:
-                # Add row
-                row = self.rowCount()
-                self.insertRow(row)
-                
-                # Add checkbox
-                checkbox = CheckBoxWidget(self)
-                self.setCellWidget(row, 0, checkbox)
-                
-                # Map common FITS keywords to our columns
-                info = {
-                    "Filename": os.path.basename(filepath),
-                    "Type": header.get('IMAGETYP', 'Light'),
-                    "Size": f"{data['shape'][1]}x{data['shape'][0]}",
-                    "Exposure": f"{header.get('EXPTIME', '-')}s",
-                    "Filter": header.get('FILTER', '-'),
-                    "Score": "-",
-                    "Stars": "-",
-                    "FWHM": "-",
-                    "Sky Background": "-",
-                    "Hot Pixels": "-",
-                    "Star Trails": "-",
-                    "Temperature": f"{header.get('CCD-TEMP', '-')}°C",
-                    "Date-Time": header.get('DATE-OBS', '-'),
-                    "Object": header.get('OBJECT', '-'),
-                    "Telescope": header.get('TELESCOP', '-'),
-                    "Focal Length": f"{header.get('FOCALLEN', '-')}mm",
-                    "Aperture": f"{header.get('APERTURE', '-')}mm",
-                    "Gain": header.get('GAIN', '-'),
-                    "Offset": header.get('OFFSET', '-'),
-                    "ROI": f"{header.get('XORGSUBF', '0')},{header.get('YORGSUBF', '0')}",
-                    "Pixel Size": f"{header.get('XPIXSZ', '-')}µm",
-                    "Bit Depth": data['dtype'],
-                    "Bayered": header.get('BAYERPAT', 'No')
-                }
-                
-                # Fill in all columns
-                for col, header_key in enumerate(self.HEADER_COLUMNS[1:], 1):  # Skip checkbox column
-                    value = info.get(header_key, '-')
-                    if isinstance(value, (int, float)):
-                        item = SortableTableWidgetItem(value)
-                    else:
-                        item = QTableWidgetItem(str(value))
-                    self.setItem(row, col, item)
-                
-                self.files.append(filepath)
-                self.headers[filepath] = header
-        finally:
-            self.setUpdatesEnabled(True)
-            
+
+        filepaths = []
+        rows = []
+        for filepath, header, data in updates:
+            row = self.build_row(filepath, header, data)
+            filepaths.append(filepath)
+            rows.append(row)
+            self.headers[filepath] = header
+            self._row_cache[filepath] = row
+        self.table_model.append_rows(filepaths, rows)
+
         if not self.pending_updates:
             self.update_timer.stop()
 
     def clear(self):
         """Clear all data from the table"""
-        self.setUpdatesEnabled(False)
-        try:
-            self.setRowCount(0)
-            self.files.clear()
-            self.headers.clear()
-            self.analysis_data.clear()
-            self.pending_updates.clear()
-        finally:
-            self.setUpdatesEnabled(True)
+        self.table_model.reset_rows([], [])
+        self.headers.clear()
+        self.analysis_data.clear()
+        self._row_cache.clear()
+        self.pending_updates.clear()
 
 class FileListTabs(QTabWidget):
     def __init__(self, main_window):
         super().__init__()
         self.main_window = main_window
-        
+
         # Create tables for each type
         self.light_table = FITSTableWidget(main_window)
         self.dark_table = FITSTableWidget(main_window)
         self.flat_table = FITSTableWidget(main_window)
         self.bias_table = FITSTableWidget(main_window)
-        
+
         # Add tabs
         self.addTab(self.light_table, "Light Frames")
         self.addTab(self.dark_table, "Dark Frames")
         self.addTab(self.flat_table, "Flat Frames")
         self.addTab(self.bias_table, "Bias/Offset Frames")
-        
+
         # Set tab tooltips
         self.setTabToolTip(0, "Light frames - Main imaging frames")
         self.setTabToolTip(1, "Dark frames - For dark current subtraction")
         self.setTabToolTip(2, "Flat frames - For vignetting correction")
         self.setTabToolTip(3, "Bias/Offset frames - For bias subtraction")
-    
+
     def get_current_table(self):
         return self.currentWidget()
-    
+
     def clear_all_tables(self):
         self.light_table.clear()
         self.dark_table.clear()
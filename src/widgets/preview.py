@@ -1,11 +1,90 @@
 from PyQt6.QtWidgets import QLabel, QFrame
-from PyQt6.QtCore import Qt
+from PyQt6.QtCore import (Qt, QObject, QRunnable, QThreadPool, QTimer,
+                          pyqtSignal)
 from PyQt6.QtGui import QImage, QPixmap
 import numpy as np
 import cv2
+import os
+from collections import OrderedDict
 from astropy.io import fits
+from threads.loading_thread import fast_scan_header, read_header_bytes
+
+try:
+    from numba import njit, prange
+except ImportError:
+    njit = None
+
+if njit is not None:
+    @njit(parallel=True, fastmath=True, cache=True)
+    def _stretch_u8(src, dst, lo, hi):
+        """Fused stretch, clamp and uint8 cast in one parallel pass
+
+        Subtract/scale/clip/astype as separate numpy calls walk the
+        frame four times; this streams a single clamped scaled store.
+        """
+        s = np.float32(255.0) / (hi - lo) if hi > lo else np.float32(0.0)
+        flat_src = src.ravel()
+        flat_dst = dst.ravel()
+        for i in prange(flat_src.size):
+            v = (flat_src[i] - lo) * s
+            if v < np.float32(0.0):
+                v = np.float32(0.0)
+            elif v > np.float32(255.0):
+                v = np.float32(255.0)
+            flat_dst[i] = np.uint8(v)
+
+# The only cards the preview needs: enough to locate and type the
+# pixel block, plus COLORIMG to pick the color pipeline
+PREVIEW_KEYWORDS = frozenset((
+    'BITPIX', 'NAXIS', 'NAXIS1', 'NAXIS2', 'NAXIS3', 'BZERO', 'BSCALE',
+    'COLORIMG',
+))
+
+# Big-endian numpy dtypes per BITPIX, as the values sit on disk
+BITPIX_RAW_DTYPES = {8: '>u1', 16: '>i2', 32: '>i4', 64: '>i8',
+                     -32: '>f4', -64: '>f8'}
+
+class PreviewSignals(QObject):
+    """Signal holder for PreviewLoader (QRunnable cannot emit directly)"""
+    # QImage or None, request token, final (False for the coarse pass)
+    image_ready = pyqtSignal(object, int, bool)
+
+class PreviewLoader(QRunnable):
+    """Render one FITS preview on the shared QThreadPool
+
+    The fits.open/stretch/resize pipeline is pure compute, so it runs
+    off the GUI thread; only the finished 380 px QImage crosses back.
+    """
+
+    def __init__(self, widget, filepath, token):
+        super().__init__()
+        self.widget = widget
+        self.filepath = filepath
+        self.token = token
+        self.signals = PreviewSignals()
+
+    def run(self):
+        # Coarse pass first: the wider stride touches a fraction of the
+        # file's pages, so something paints almost immediately while
+        # the full-quality pass is still reading
+        try:
+            coarse = self.widget.render_fits(
+                self.filepath, PreviewWidget.COARSE_PREVIEW_SIZE)
+            self.signals.image_ready.emit(coarse, self.token, False)
+        except Exception:
+            pass  # the full pass below reports errors
+        try:
+            image = self.widget.render_fits(self.filepath)
+        except Exception as e:
+            print(f"Error displaying FITS file: {str(e)}")
+            image = None
+        self.signals.image_ready.emit(image, self.token, True)
 
 class PreviewWidget(QFrame):
+    MAX_PREVIEW_SIZE = 380
+    COARSE_PREVIEW_SIZE = 128  # first progressive pass on large files
+    PIXMAP_CACHE_MAX = 32  # rendered previews kept for repeat clicks
+
     def __init__(self, parent=None):
         super().__init__(parent)
         self.setFrameStyle(QFrame.Shape.StyledPanel | QFrame.Shadow.Raised)
@@ -19,98 +98,259 @@ class PreviewWidget(QFrame):
         
         # Center the label in the frame
         self.preview_label.setGeometry(10, 10, 380, 380)
-    
+
+        self._preview_token = 0
+        self._pending_keys = {}  # in-flight token -> cache key
+        self._pixmap_cache = OrderedDict()  # (path, mtime_ns) -> QPixmap
+
+        # Debounce so arrow-keying through the table decodes only the
+        # file the user settles on, not every one passed over
+        self._debounce = QTimer(self)
+        self._debounce.setSingleShot(True)
+        self._debounce.setInterval(80)
+        self._debounce.timeout.connect(self._display_pending)
+        self._pending_path = None
+
+    def fit_preview_size(self, data):
+        """Downscale a frame to the preview size before any stretch"""
+        if data.ndim != 2 and not (data.ndim == 3 and data.shape[2] == 3):
+            return data
+        height, width = data.shape[:2]
+        if max(height, width) <= self.MAX_PREVIEW_SIZE:
+            return data
+        scale = self.MAX_PREVIEW_SIZE / max(height, width)
+        # cv2.resize only takes 8/16-bit ints and float32
+        if data.dtype not in (np.uint8, np.uint16, np.float32):
+            data = data.astype(np.float32)
+        return cv2.resize(data, (int(width * scale), int(height * scale)),
+                          interpolation=cv2.INTER_AREA)
+
     def enhance_mono_image(self, data):
-        """Enhance monochrome image"""
-        # Normalize to 0-255 range and convert to uint8
-        normalized = cv2.normalize(data, None, 0, 255, cv2.NORM_MINMAX)
-        normalized = normalized.astype(np.uint8)
-        return normalized
+        """Stretch between the 1st and 99th percentiles to uint8
+
+        Hot pixels and cosmic rays own the absolute extrema, so a
+        min/max normalize squeezes almost every real pixel into a few
+        dark bins. The percentiles come from a stride-8 subsample —
+        ~64x fewer samples with no visible difference in the limits.
+        """
+        samp = data[::8, ::8] if data.ndim == 2 else data
+        lo, hi = np.percentile(samp, [1.0, 99.0])
+
+        if data.dtype in (np.uint8, np.uint16):
+            # One gather through a 256-entry or 64k LUT; no float math
+            # on the frame itself
+            levels = 256 if data.dtype == np.uint8 else 65536
+            scale = 255.0 / (hi - lo) if hi > lo else 0.0
+            lut = np.clip((np.arange(levels, dtype=np.float32) - lo) * scale,
+                          0, 255).astype(np.uint8)
+            return lut[data]
+
+        src = np.ascontiguousarray(data, dtype=np.float32)
+        if njit is not None:
+            dst = np.empty(src.shape, np.uint8)
+            _stretch_u8(src, dst, np.float32(lo), np.float32(hi))
+            return dst
+        scale = np.float32(255.0 / (hi - lo)) if hi > lo else np.float32(0.0)
+        np.subtract(src, np.float32(lo), out=src)
+        np.multiply(src, scale, out=src)
+        np.clip(src, 0, 255, out=src)
+        return src.astype(np.uint8)
+
+    def enhance_color_image(self, data):
+        """Normalize a HxWx3 image to uint8 in one vectorized pass
+
+        Same per-channel min/max stretch the old per-plane loop did,
+        but over the whole array at once instead of three separate
+        cv2.normalize passes into a pre-zeroed destination.
+        """
+        flat = data.reshape(-1, 3)
+        mn = flat.min(axis=0).astype(np.float32)
+        mx = flat.max(axis=0).astype(np.float32)
+        scale = 255.0 / np.where(mx > mn, mx - mn, 1.0)
+        stretched = (data - mn) * scale
+        return stretched.astype(np.uint8)
     
+    def to_qimage(self, enhanced, detach=True):
+        """Wrap a uint8 array as a QImage
+
+        detach=True copies the pixels out of the numpy buffer, needed
+        when the image outlives the caller's scope (pool-thread
+        renders). Callers that convert to a QPixmap while the array is
+        still alive can pass detach=False and skip that copy — the
+        pixmap conversion makes its own.
+        """
+        enhanced = np.ascontiguousarray(enhanced)
+        height, width = enhanced.shape[:2]
+        if enhanced.ndim == 3:
+            q_img = QImage(enhanced.data, width, height, 3 * width,
+                           QImage.Format.Format_RGB888)
+        else:
+            q_img = QImage(enhanced.data, width, height, width,
+                           QImage.Format.Format_Grayscale8)
+        return q_img.copy() if detach else q_img
+
+    def _cache_key(self, filepath):
+        """Cache key for a file; mtime evicts stale renders naturally"""
+        try:
+            return (filepath, os.stat(filepath).st_mtime_ns)
+        except OSError:
+            return None
+
     def display_fits(self, filepath):
-        """Display a FITS file"""
+        """Display a FITS file, debounced and rendered off the GUI thread"""
+        # Cached frames paint instantly with no I/O or compute; only
+        # uncached files wait out the debounce
+        key = self._cache_key(filepath)
+        if key is not None and key in self._pixmap_cache:
+            self._preview_token += 1  # supersede in-flight renders
+            self._debounce.stop()
+            self._pixmap_cache.move_to_end(key)
+            self.preview_label.setPixmap(self._pixmap_cache[key])
+            return
+        self._pending_path = filepath
+        self._debounce.start()
+
+    def _display_pending(self):
+        """Debounce expiry: render the file the user settled on"""
+        filepath = self._pending_path
+        if filepath is None:
+            return
+        # A newer request supersedes anything in flight; stale results
+        # are dropped by token in _apply_preview
+        self._preview_token += 1
+        self._pending_keys[self._preview_token] = self._cache_key(filepath)
+        loader = PreviewLoader(self, filepath, self._preview_token)
+        loader.signals.image_ready.connect(self._apply_preview)
+        QThreadPool.globalInstance().start(loader)
+
+    def _apply_preview(self, image, token, final):
+        """Receive a rendered preview on the GUI thread"""
+        key = self._pending_keys.pop(token, None) if final else None
+        if token != self._preview_token:
+            return
+        if image is None:
+            if final:
+                self.preview_label.setText("Error loading image")
+            return
+        pixmap = QPixmap.fromImage(image)
+        if not final:
+            # Blow the coarse pass up to label size; the full-quality
+            # image replaces it moments later
+            pixmap = pixmap.scaled(
+                self.MAX_PREVIEW_SIZE, self.MAX_PREVIEW_SIZE,
+                Qt.AspectRatioMode.KeepAspectRatio,
+                Qt.TransformationMode.FastTransformation)
+        if key is not None:
+            self._pixmap_cache[key] = pixmap
+            if len(self._pixmap_cache) > self.PIXMAP_CACHE_MAX:
+                self._pixmap_cache.popitem(last=False)
+        self.preview_label.setPixmap(pixmap)
+
+    def _render(self, data, is_color):
+        """Shared preview pipeline: downscale then stretch to uint8
+
+        Both display paths funnel through here so the downscale-first
+        ordering and the stretch fast paths only exist in one place.
+        """
+        # Downscale first so the stretch runs on preview-sized data
+        data = self.fit_preview_size(data)
+
+        if is_color and len(data.shape) == 3 and data.shape[2] == 3:
+            return self.enhance_color_image(data)
+        # Mono frames stay single-channel: Qt paints Grayscale8
+        # directly, so no RGB triplication
+        return self.enhance_mono_image(data)
+
+    def _strided_grid(self, data, header, target=None):
+        """Pull a strided sub-grid off a memmapped frame
+
+        The preview needs at most `target` px per side (the label size
+        by default), so only every s-th row's pages ever come off disk
+        instead of the whole frame.
+        """
+        stride = max(1, max(header.get('NAXIS1', 0),
+                            header.get('NAXIS2', 0))
+                     // (target or self.MAX_PREVIEW_SIZE))
+        if stride > 1:
+            if data.ndim == 2:
+                data = data[::stride, ::stride]
+            elif data.ndim == 3 and data.shape[2] == 3:
+                data = data[::stride, ::stride, :]
+            elif data.ndim == 3 and data.shape[0] == 3:
+                data = data[:, ::stride, ::stride]
+        return data
+
+    def _read_preview_raw(self, filepath, target=None):
+        """Read the strided preview grid without parsing the full header
+
+        The loader's raw-byte scanner pulls just the cards that locate
+        and type the pixel block, so astropy's full Header grammar —
+        which walks every card of the primary HDU — never runs on the
+        preview path. The pixel block starts right after the header
+        blocks and is memmapped with its on-disk dtype; BZERO is a pure
+        shift (uint16 stored as int16 + 32768) and the percentile
+        stretch is shift-invariant, so raw values render identically.
+        Raises on anything irregular (BSCALE-scaled data, odd BITPIX,
+        truncated header) and the caller falls back to astropy.
+        """
+        buf = read_header_bytes(filepath)
+        header = fast_scan_header(buf, PREVIEW_KEYWORDS)
+        if header.get('BSCALE', 1) != 1:
+            raise ValueError("BSCALE-scaled data")
+        naxis = header['NAXIS']
+        if naxis not in (2, 3):
+            raise ValueError(f"unsupported NAXIS {naxis}")
+        shape = tuple(header[f'NAXIS{i}'] for i in range(naxis, 0, -1))
+        dtype = BITPIX_RAW_DTYPES[header['BITPIX']]
+        # read_header_bytes returns whole 2880-byte blocks through the
+        # END card, so its length is exactly the data offset
+        data = np.memmap(filepath, mode='r', dtype=dtype, shape=shape,
+                         offset=len(buf))
+        data = np.ascontiguousarray(self._strided_grid(data, header, target))
+        return data, bool(header.get('COLORIMG', False))
+
+    def _read_preview_astropy(self, filepath, target=None):
+        """Fallback reader for files the raw-byte path rejects"""
+        # do_not_scale_image_data keeps uint16 camera frames as raw
+        # integers instead of astropy applying BZERO/BSCALE and
+        # ballooning the HDU to float. The stretch is invariant to that
+        # linear scaling, so the preview looks identical at half the
+        # memory traffic
+        with fits.open(filepath, memmap=True, lazy_load_hdus=True,
+                       do_not_scale_image_data=True) as hdul:
+            header = hdul[0].header
+            is_color = header.get('COLORIMG', False)
+            data = self._strided_grid(hdul[0].data, header, target)
+            # Materialize before the memmap closes with the file
+            data = np.ascontiguousarray(data)
+        return data, is_color
+
+    def render_fits(self, filepath, target=None):
+        """Load, stretch and convert a FITS file to a QImage
+
+        Pure compute with no widget access, so it is safe to call from
+        a pool thread. `target` caps the rendered size; the coarse
+        progressive pass uses it to read far fewer pages.
+        """
         try:
-            with fits.open(filepath) as hdul:
-                data = hdul[0].data
-                header = hdul[0].header
-                
-                # Check if color image
-                is_color = header.get('COLORIMG', False)
-                
-                if is_color:
-                    # Handle color image
-                    if len(data.shape) == 3 and data.shape[2] == 3:
-                        # Process each channel separately
-                        enhanced = np.zeros((data.shape[0], data.shape[1], 3), dtype=np.uint8)
-                        for i in range(3):
-                            enhanced[:,:,i] = self.enhance_mono_image(data[:,:,i])
-                    else:
-                        # Handle monochrome image treated as color
-                        mono = self.enhance_mono_image(data)
-                        enhanced = np.stack([mono, mono, mono], axis=2)
-                else:
-                    # Handle monochrome image
-                    mono = self.enhance_mono_image(data)
-                    enhanced = np.stack([mono, mono, mono], axis=2)
-                
-                # Scale image to fit preview
-                height, width = enhanced.shape[:2]
-                max_size = 380
-                if width > max_size or height > max_size:
-                    scale = max_size / max(width, height)
-                    new_width = int(width * scale)
-                    new_height = int(height * scale)
-                    enhanced = cv2.resize(enhanced, (new_width, new_height))
-                
-                # Convert to QImage and display
-                height, width, channels = enhanced.shape
-                bytes_per_line = 3 * width
-                q_img = QImage(enhanced.data, width, height, bytes_per_line, QImage.Format.Format_RGB888)
-                pixmap = QPixmap.fromImage(q_img)
-                self.preview_label.setPixmap(pixmap)
-                
-        except Exception as e:
-            print(f"Error displaying FITS file: {str(e)}")
-            self.preview_label.setText("Error loading image")
+            data, is_color = self._read_preview_raw(filepath, target)
+        except (KeyError, ValueError, UnicodeDecodeError):
+            data, is_color = self._read_preview_astropy(filepath, target)
+        return self.to_qimage(self._render(data, is_color))
     
     def display_array(self, data, header=None):
         """Display a numpy array"""
         try:
             # Check if color image
             is_color = header.get('COLORIMG', False) if header else len(data.shape) == 3
-            
-            if is_color:
-                # Handle color image
-                if len(data.shape) == 3 and data.shape[2] == 3:
-                    # Process each channel separately
-                    enhanced = np.zeros((data.shape[0], data.shape[1], 3), dtype=np.uint8)
-                    for i in range(3):
-                        enhanced[:,:,i] = self.enhance_mono_image(data[:,:,i])
-                else:
-                    # Handle monochrome image treated as color
-                    mono = self.enhance_mono_image(data)
-                    enhanced = np.stack([mono, mono, mono], axis=2)
-            else:
-                # Handle monochrome image
-                mono = self.enhance_mono_image(data)
-                enhanced = np.stack([mono, mono, mono], axis=2)
-            
-            # Scale image to fit preview
-            height, width = enhanced.shape[:2]
-            max_size = 380
-            if width > max_size or height > max_size:
-                scale = max_size / max(width, height)
-                new_width = int(width * scale)
-                new_height = int(height * scale)
-                enhanced = cv2.resize(enhanced, (new_width, new_height))
-            
-            # Convert to QImage and display
-            height, width, channels = enhanced.shape
-            bytes_per_line = 3 * width
-            q_img = QImage(enhanced.data, width, height, bytes_per_line, QImage.Format.Format_RGB888)
-            pixmap = QPixmap.fromImage(q_img)
+
+            enhanced = self._render(data, is_color)
+
+            # Convert to QImage and display; enhanced is alive for the
+            # whole conversion, so no detaching copy is needed
+            pixmap = QPixmap.fromImage(self.to_qimage(enhanced, detach=False))
             self.preview_label.setPixmap(pixmap)
-            
+
         except Exception as e:
             print(f"Error displaying array: {str(e)}")
             self.preview_label.setText("Error displaying image")